@@ -7,6 +7,8 @@
 
 # Load relevant libraries
 import numpy as np 
+from samuelsonSolver import solve_samuelson, samuelson_state_at
+from shockSchedule import ShockSchedule
 
 ### Simulate Samuelson 1939
 
@@ -27,22 +29,21 @@ beta = 0.6
 C = np.ones((S, Q))
 I = np.ones((S, Q))
 
-# Construct matrices for exogenous variables or parameters that will change 
-# over time to capture different scenarios, initialise at 5
-G0 = np.ones((S, Q))*5 
+# Construct schedules for exogenous variables or parameters that will change
+# over time to capture different scenarios, initialise at 5; only the
+# periods in which they change are stored
+G0 = ShockSchedule(S, 5)
 
 # Set parameter values for different scenarios
-G0[1, s:Q] = 6  # scenario: permanent increase in government spending from I0=5 to I0=6 from period s=15 onwards
+G0.set(1, s, 6)  # scenario: permanent increase in government spending from I0=5 to I0=6 from period s=15 onwards
 
-# Solve this system recursively based on the initialization
-for i in range(S):
-    for t in range(1, Q):
-        C[i, t] = c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1])
-        I[i, t] = beta * (c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1]) - 
-                          C[i, t - 1])
+# Solve this system recursively based on the initialization, advancing all
+# scenarios together (see samuelsonSolver.solve_samuelson_loop for the
+# scalar version of the same recursion)
+C, I = solve_samuelson(C, I, G0, c1, beta)
 
-# Calculate output
-Y = C + G0 + I
+# Calculate output, adding G0 segment by segment
+Y = G0.add_to(C + I)
 
 # Display the solutions at time Q
 print(Y[:, Q - 1])
@@ -50,6 +51,11 @@ print(Y[:, Q - 1])
 # Verify solutions for Y
 print((G0[:,Q - 1])/(1-c1))
 
+# Jump straight to period Q - 1 with the companion-matrix solver, without
+# stepping through the periods in between
+_, _, Y_jump = samuelson_state_at(Q - 1, C[:, 0], I[:, 0], G0, c1, beta)
+print(Y_jump)
+
 
 import matplotlib.pyplot as plt
 
@@ -1,9 +1,20 @@
 import pygame
 import numpy as np
 
+from samuelsonSolver import iterate_economy
+from shockSchedule import ShockSchedule
+from pygameText import TextCache, TextField
+from renderScheduler import RenderScheduler
+from pygameCharts import DualAxisChart, FigurePool
+from headless import HeadlessRun
+
 ##################
 # pygame setup
 ##################
+# --headless runs a scripted batch without a window (see headless.py)
+headless = HeadlessRun.from_args(scenario_key="e")
+get_events = pygame.event.get if headless is None else headless.events
+
 pygame.init()
 screen = pygame.display.set_mode((1280, 720))
 clock = pygame.time.Clock()
@@ -12,19 +23,9 @@ dt = 0
 
 # Fonts
 my_font = pygame.font.SysFont('Comic Sans MS', 30)
-##################
-
-
-##################
-# Matplotlib setup
-# Within pygame, see article here:
-# 
-##################
-import matplotlib
-matplotlib.use("Agg")
 
-import matplotlib.backends.backend_agg as agg
-import matplotlib.pyplot as plt
+# Only changed regions of the screen are redrawn
+scheduler = RenderScheduler(screen, "purple")
 ##################
 
 
@@ -46,23 +47,29 @@ beta = 0.6
 # Construct (S x max_iter) matrices in which values for different periods will be stored; initialize at 1
 C = np.ones((S, max_iter))
 I = np.ones((S, max_iter))
-G0 = np.ones((S, max_iter))*5 
-
-# Calculate output
-Y = C + G0 + I
+# Exogenous variables as breakpoint schedules, initialised at 5
+G0 = ShockSchedule(S, 5)
 
 # Set parameter values for different scenarios
-G0[1, s:max_iter] = 6  # scenario: permanent increase in government spending from I0=5 to I0=6 from period s=15 onwards
+G0.set(1, s, 6)  # scenario: permanent increase in government spending from I0=5 to I0=6 from period s=15 onwards
+
+# Calculate output
+Y = G0.add_to(C + I)
 
 
 ##################
 
-def iterate_economy(C, I , c1, G0, beta, i, t):
-        C[i, t] = c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1])
-        I[i, t] = beta * (c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1]) - 
-                          C[i, t - 1])
+# One consumption/investment chart per scenario, built once and reused for
+# every frame
+CI_charts = FigurePool(lambda sim_no: DualAxisChart("Figure 4: Consumption and Investment" + str(sim_no)),
+                       range(S))
 
-        return C, I
+# Text surfaces: static labels are rendered once, the numeric fields only
+# when their displayed value changes
+text_cache = TextCache()
+iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, (255, 255, 255))
+Y_text = TextField(text_cache, my_font, 'Y: ', (255, 255, 255))
+iter_text = TextField(text_cache, my_font, 'Iteration number: ', (255, 255, 255))
 
 for sim_no in range(S):
 
@@ -70,16 +77,23 @@ for sim_no in range(S):
     if not running:
         break
 
+    # New scenario: redraw the whole screen once
+    scheduler.invalidate()
+
     # Count number of iterations for this simulation
     iteration_count = 1
     is_iter = False
     in_sim = True
+    chart_changed = True
+    if headless is not None:
+        headless.record(sim_no, iteration_count - 1, Y=Y[sim_no, iteration_count - 1], C=C[sim_no, iteration_count - 1],
+                        I=I[sim_no, iteration_count - 1], G0=G0[sim_no, iteration_count - 1], beta=beta)
 
     while in_sim and running and iteration_count < max_iter:
 
         # poll for events
         # pygame.QUIT event means the user clicked X to close your window
-        for event in pygame.event.get():
+        for event in get_events():
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.KEYDOWN:
@@ -99,29 +113,29 @@ for sim_no in range(S):
             if is_iter:
                 # Run economy updates
                 C, I = iterate_economy(C, I , c1, G0, beta, sim_no, iteration_count)
-                # Calculate output
-                Y = C + G0 + I
+                # Calculate output of the new period
+                Y[:, iteration_count] = C[:, iteration_count] + G0[:, iteration_count] + I[:, iteration_count]
 
                 iteration_count += 1
+                chart_changed = True
+                if headless is not None:
+                    headless.record(sim_no, iteration_count - 1, Y=Y[sim_no, iteration_count - 1], C=C[sim_no, iteration_count - 1],
+                                    I=I[sim_no, iteration_count - 1], G0=G0[sim_no, iteration_count - 1], beta=beta)
                 # Wait for next iteration from player
                 is_iter = False
 
-            # fill the screen with a color to wipe away anything from last frame
-            screen.fill("purple")
-
             #########################
             # Update economic visuals
             #########################
 
             # Add simple text
-            iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, (255, 255, 255))
-            Y_text_surface = my_font.render('Y: ' + str(Y[:, iteration_count - 1]), True, (255, 255, 255))
-            iter_text_surface = my_font.render('Iteration number: ' + str(iteration_count), True, (255, 255, 255))
+            Y_text_surface = Y_text.render(Y[:, iteration_count - 1])
+            iter_text_surface = iter_text.render(iteration_count)
 
             # Render text on the page at the specified positions
-            screen.blit(iterate_text_surface, (50, 10)) 
-            screen.blit(Y_text_surface, (50, 150)) 
-            screen.blit(iter_text_surface, (50, 600)) 
+            scheduler.show("iterate_text", iterate_text_surface, (50, 10))
+            scheduler.show("Y_text", Y_text_surface, (50, 150))
+            scheduler.show("iter_text", iter_text_surface, (50, 600))
 
             # Plot output
             # plt.plot(range(1, iteration_count), Y[0, 0:iteration_count - 1], color='black', linewidth=2, linestyle='-')
@@ -142,43 +156,27 @@ for sim_no in range(S):
             # surf = pygame.image.fromstring(raw_data, size, "RGB")
             # screen.blit(surf, (800,0))
 
-            # Plot consumption and investment
-            fig, ax1 = plt.subplots()
-            plt.xlabel("Time")
-            plt.ylabel("C")
-            plt_title = "Figure 4: Consumption and Investment" + str(sim_no)
-            plt.title(plt_title, fontsize=10)
-
-            ax1.plot(range(1, iteration_count), C[0, 0:iteration_count - 1], color='black', linewidth=2, linestyle='-', 
-                    label='C')
-            ax1.set_xlabel("Time")
-            ax1.set_ylabel("C", color='black')
-            ax1.tick_params(axis='y', labelcolor='black')
-            ax2 = ax1.twinx()
-            ax2.plot(range(1, iteration_count), I[0, 0:iteration_count - 1], color='black', linewidth=2, linestyle='--',
-                    label='I')
-            ax2.set_ylabel("I", color='black')
-            ax2.tick_params(axis='y', labelcolor='black')
-            lines, labels = ax1.get_legend_handles_labels()
-            lines2, labels2 = ax2.get_legend_handles_labels()
-            ax2.legend(lines + lines2, labels + labels2, loc='right')
-            canvas = agg.FigureCanvasAgg(fig)
-            canvas.draw()
-            renderer = canvas.get_renderer()
-            raw_data = renderer.tostring_rgb()
-
-            size = canvas.get_width_height()
-
-            surf = pygame.image.fromstring(raw_data, size, "RGB")
-            screen.blit(surf, (600,200))
+            # Plot consumption and investment, on this scenario's pre-built chart
+            if chart_changed:
+                chart = CI_charts.get(sim_no)
+                chart.update(range(1, iteration_count), C[sim_no, 0:iteration_count - 1],
+                             I[sim_no, 0:iteration_count - 1])
+                surf = chart.render()
+                scheduler.show("CI_chart", surf, (600,200), changed=True)
+                chart_changed = False
             ##########################
 
-            # flip() the display to put your work on screen
-            pygame.display.flip()
+            # Push only the changed regions to the display; frames in which nothing
+            # changed are skipped
+            scheduler.update()
+            if headless is not None:
+                headless.save_frame(screen)
 
         # limits FPS to 60
         # dt is delta time in seconds since last frame, used for framerate-
         # independent physics.
-        dt = clock.tick(60) / 1000
+        dt = clock.tick(60 if headless is None else 0) / 1000
 
+if headless is not None:
+    headless.finish()
 pygame.quit()
\ No newline at end of file
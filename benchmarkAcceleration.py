@@ -0,0 +1,68 @@
+import numpy as np
+
+from neoclassicalSynthesisSolver import solve_synthesis
+
+##################
+# Iteration counts of the fixed-point accelerators on the six neoclassical
+# synthesis scenarios, against the fixed 1000 iterations of
+# neoclassicalSynthesis.py
+##################
+S = 6
+scenario_names = ["1:Baseline", "2:Fall animal spirits", "3:Rise product.",
+                  "4:Rise exp. price", "5:Monetary expan.", "6:Fiscal expan."]
+
+# Same scenarios as neoclassicalSynthesis.py
+A = np.full(S, 2.0)
+i0 = np.full(S, 2.0)
+M0 = np.full(S, 5.0)
+G0 = np.full(S, 1.0)
+P0 = np.full(S, 1.0)
+i0[1] = 1.5
+A[2] = 3
+P0[3] = 1.5
+M0[4] = 6
+G0[5] = 2
+
+c0 = 2
+c1 = 0.6
+i1 = 0.1
+m1 = 0.2
+m2 = 0.4
+Nf = 5
+K = 4
+a = 0.3
+b = 0.4
+T0 = 1
+m0 = 6
+
+tol = 1e-10
+methods = [("plain", {}),
+           ("damped", {"omega": 0.5}),
+           ("aitken", {}),
+           ("anderson", {"m": 3}),
+           ("anderson", {"m": 5})]
+
+labels = [name + "".join("(" + k + "=" + str(v) + ")" for k, v in opts.items())
+          for name, opts in methods]
+print("tol = " + str(tol) + ", baseline = 1000 iterations per scenario")
+print("scenario".ljust(24) + "".join(label.rjust(20) for label in labels))
+
+totals = np.zeros(len(methods), dtype=int)
+for i in range(S):
+    row = scenario_names[i].ljust(24)
+    for j, (name, opts) in enumerate(methods):
+        # Every solve starts from the same arbitrary initialization
+        result = solve_synthesis(G0[i], c0, c1, T0, i0[i], i1, m0, M0[i], m2, m1, Nf, A[i], a, K,
+                                 P0[i], b, accelerator=name, tol=tol, max_iter=1000, **opts)
+        cell = str(result.iterations)
+        if result.fallbacks:
+            cell += " (" + str(result.fallbacks) + "fb)"
+        if not result.converged:
+            cell += "*"
+        totals[j] += result.iterations
+        row += cell.rjust(20)
+    print(row)
+
+print("total".ljust(24) + "".join(str(t).rjust(20) for t in totals) +
+      "   (baseline " + str(1000 * S) + ")")
+print("fb = accelerated steps rejected for a plain step, * = not converged")
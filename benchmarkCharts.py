@@ -0,0 +1,81 @@
+import os
+import time
+
+# Render off-screen, no window needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from pygameCharts import LineChart, PygameLineChart
+
+import matplotlib.backends.backend_agg as agg
+import matplotlib.pyplot as plt
+
+##################
+# Per-step render time of one chart: the old pyplot path of the pygame
+# scripts (plot the whole history, rasterize from scratch) against a
+# persistent LineChart and the native PygameLineChart, at several history
+# lengths
+##################
+MAX_PLOT_LENGTH = 100
+STEPS = 20
+
+def old_render(series, plot_min, plot_max):
+    # As in lewisModelPygame.py before the charts were reused (buffer_rgba
+    # instead of the tostring_rgb that newer matplotlib no longer has)
+    plt.plot(series, color='black', linewidth=2, linestyle='-')
+    plt.xlabel("Time")
+    plt.ylabel("Y")
+    plt_title = "Benchmark: Output"
+    plt.title(plt_title, fontsize=15)
+    plt.xlim((plot_min, plot_max))
+    fig = plt.figure(plt_title)
+    fig.set_figwidth(5)
+    fig.set_figheight(4)
+
+    canvas = agg.FigureCanvasAgg(fig)
+    canvas.draw()
+    raw_data = bytes(canvas.buffer_rgba())
+
+    size = canvas.get_width_height()
+    surf = pygame.image.fromstring(raw_data, size, "RGBA")
+    surf = pygame.transform.scale(surf, (400, 360))
+    plt.clf()
+    return surf
+
+chart = LineChart("Benchmark: Output", "Y")
+
+def new_render(series, plot_min, plot_max):
+    chart.update(series, plot_min, plot_max)
+    return chart.render()
+
+native_chart = PygameLineChart("Benchmark: Output", "Y")
+
+def native_render(series, plot_min, plot_max):
+    native_chart.update(series, plot_min, plot_max)
+    return native_chart.render()
+
+def ms_per_step(render, history, steps=STEPS):
+    series = list(np.sin(np.arange(history) / 10.0))
+    times = []
+    for step in range(steps):
+        # Every step appends a point and redraws, as in the pygame loop
+        series.append(float(np.sin(len(series) / 10.0)))
+        plot_max = len(series) - 1
+        plot_min = max(0, plot_max - MAX_PLOT_LENGTH)
+        start = time.perf_counter()
+        render(series, plot_min, plot_max)
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1e3
+
+pygame.init()
+print("ms per step".ljust(16) + "old pyplot".rjust(14) + "LineChart".rjust(14) +
+      "PygameLineChart".rjust(18))
+for history in (100, 1000, 10000):
+    old = ms_per_step(old_render, history)
+    new = ms_per_step(new_render, history)
+    native = ms_per_step(native_render, history, steps=1000)
+    print((str(history) + " points").ljust(16) + str(round(old, 2)).rjust(14) +
+          str(round(new, 2)).rjust(14) + str(round(native, 3)).rjust(18))
+pygame.quit()
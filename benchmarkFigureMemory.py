@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import time
+
+##################
+# Resident memory of the consumption/investment chart in
+# basicModelsPygame.py after a number of pygame events: a new pyplot
+# figure per event (as before) against the pre-built FigurePool charts.
+# Each mode runs in its own process so their memory does not mix.
+# Every never-closed figure of the old mode keeps about 2 MB, so it runs at
+# most old_events events and its memory is extrapolated to the others.
+#
+# python benchmarkFigureMemory.py [events [old_events]]
+##################
+
+OLD_EVENTS = 500
+
+def resident_mb():
+    # Current resident set size, from /proc on Linux
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def run(mode, events, target=None):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import warnings
+    import numpy as np
+    import pygame
+    import matplotlib.backends.backend_agg as agg
+    import matplotlib.pyplot as plt
+    from pygameCharts import DualAxisChart, FigurePool
+
+    warnings.simplefilter("ignore")
+    pygame.init()
+    S, Q = 2, 100
+    C = np.ones((S, Q))
+    I = np.ones((S, Q))
+    pool = FigurePool(lambda sim_no: DualAxisChart("Figure 4: Consumption and Investment" + str(sim_no)),
+                      range(S))
+
+    start_mb = resident_mb()
+    start = time.perf_counter()
+    for event in range(events):
+        sim_no = event % S
+        iteration_count = 1 + event % (Q - 1)
+        if mode == "old":
+            # The per-event figure of basicModelsPygame.py, never closed
+            fig, ax1 = plt.subplots()
+            ax1.plot(range(1, iteration_count), C[0, 0:iteration_count - 1], color='black', linewidth=2, linestyle='-',
+                     label='C')
+            ax2 = ax1.twinx()
+            ax2.plot(range(1, iteration_count), I[0, 0:iteration_count - 1], color='black', linewidth=2, linestyle='--',
+                     label='I')
+            canvas = agg.FigureCanvasAgg(fig)
+            canvas.draw()
+            surf = pygame.image.fromstring(bytes(canvas.buffer_rgba()), canvas.get_width_height(), "RGBA")
+        else:
+            chart = pool.get(sim_no)
+            chart.update(range(1, iteration_count), C[sim_no, 0:iteration_count - 1],
+                         I[sim_no, 0:iteration_count - 1])
+            surf = chart.render()
+    elapsed = time.perf_counter() - start
+
+    end_mb = resident_mb()
+    print(mode.ljust(8) + str(events).rjust(8) + str(round(start_mb)).rjust(12) +
+          str(round(end_mb)).rjust(12) + str(round(elapsed / events * 1e3, 1)).rjust(12))
+    if target and target > events:
+        # Memory grows linearly with the events in the old mode
+        print(mode.ljust(8) + str(target).rjust(8) + str(round(start_mb)).rjust(12) +
+              ("~" + str(round(start_mb + (end_mb - start_mb) / events * target))).rjust(12) +
+              "  (extrapolated)")
+
+
+if len(sys.argv) > 1 and sys.argv[1] in ("old", "pool"):
+    run(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else None)
+else:
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    old_events = min(events, int(sys.argv[2]) if len(sys.argv) > 2 else OLD_EVENTS)
+    print("mode".ljust(8) + "events".rjust(8) + "start MB".rjust(12) + "end MB".rjust(12) +
+          "ms/event".rjust(12), flush=True)
+    subprocess.run([sys.executable, __file__, "old", str(old_events), str(events)], check=True)
+    subprocess.run([sys.executable, __file__, "pool", str(events)], check=True)
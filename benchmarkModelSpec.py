@@ -0,0 +1,87 @@
+import timeit
+import numpy as np
+
+import lewisModel
+import neoclassicalSolver
+import neoclassicalSynthesisSolver
+import samuelsonSolver
+from modelSpecs import LEWIS, NEOCLASSICAL, NEOCLASSICAL_SYNTHESIS, SAMUELSON
+
+##################
+# Per-step cost of the compiled ModelSpec step functions against each
+# model's iterate_economy (hand-written for Samuelson and Lewis; for the
+# neoclassical models a wrapper that binds the generated step on every
+# call), plus the compiled step on arrays of scenarios
+##################
+N_STEPS = 20000
+S = 10000
+
+def per_step(fn, number=N_STEPS):
+    # Best of three, in microseconds per step
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+def report(name, hand, compiled, batched, check):
+    print(name.ljust(24) + str(round(hand, 2)).rjust(16) + str(round(compiled, 2)).rjust(12) +
+          str(round(batched, 2)).rjust(18) + str(round(batched / S * 1e3, 2)).rjust(14) +
+          ("   ok" if check else "   MISMATCH"))
+
+print("us per step".ljust(24) + "iterate_economy".rjust(16) + "compiled".rjust(12) +
+      ("compiled S=" + str(S)).rjust(18) + "ns/scenario".rjust(14))
+
+# Samuelson
+c1, beta = 0.8, 0.6
+C = np.ones((1, 3))
+I = np.ones((1, 3))
+G0 = np.ones((1, 3)) * 5
+hand = per_step(lambda: samuelsonSolver.iterate_economy(C, I, c1, G0, beta, 0, 1))
+step = SAMUELSON.bind(c1=c1, beta=beta, G0=5.0)
+compiled = per_step(lambda: step(1.0, 1.0))
+batch = (np.ones(S), np.ones(S))
+batched = per_step(lambda: step(*batch), number=200)
+samuelsonSolver.iterate_economy(C, I, c1, G0, beta, 0, 1)
+report("Samuelson", hand, compiled, batched, np.allclose(step(1.0, 1.0), (C[0, 1], I[0, 1])))
+
+# Lewis
+lewis = dict(alpha=0.7, rho=1, L=20, gamma=0.2, lambda_val=10, beta=0.7, w1=1)
+state = (1, 1, 1, 10, 1, 2.0, 18.0)  # Y1, w2, Y2, K, P2, L2, L1
+Y1, w2, Y2, K, P2, L2, L1 = state
+hand = per_step(lambda: lewisModel.iterate_economy(L1, 10, 0.7, 0.2, L2, 1, 1, 0.7, K, P2, w2, 20))
+step = LEWIS.bind(**lewis)
+compiled = per_step(lambda: step(*state))
+batch = tuple(np.full(S, float(x)) for x in state)
+batched = per_step(lambda: step(*batch), number=200)
+report("Lewis", hand, compiled, batched,
+       np.allclose(step(*state),
+                   lewisModel.iterate_economy(L1, 10, 0.7, 0.2, L2, 1, 1, 0.7, K, P2, w2, 20)))
+
+# Neoclassical macro
+A, leisure, G0, Yf, M0 = (np.array([x]) for x in (2.0, 0.4, 1.0, 1.0, 5.0))
+params = dict(a=0.3, K=5, discount_rate=0.9, money_pref=0.6, Gf=1, pe=0.02)
+hand = per_step(lambda: neoclassicalSolver.iterate_economy(0, A, 0.3, 5, 1.0, 1.0, leisure, 0.9, 0.6,
+                                                           G0, Yf, 1, 1.0, M0, 0.02))
+step = NEOCLASSICAL.bind(A=2.0, leisure=0.4, G0=1.0, Yf=1.0, M0=5.0, **params)
+state = (1.0,) * 8
+compiled = per_step(lambda: step(*state))
+batch = tuple(np.ones(S) for _ in state)
+batched = per_step(lambda: step(*batch), number=200)
+report("Neoclassical", hand, compiled, batched,
+       np.allclose(step(*state),
+                   neoclassicalSolver.iterate_economy(0, A, 0.3, 5, 1.0, 1.0, leisure, 0.9, 0.6,
+                                                      G0, Yf, 1, 1.0, M0, 0.02)))
+
+# Neoclassical synthesis
+params = dict(c0=2, c1=0.6, i1=0.1, m1=0.2, m2=0.4, Nf=5, K=4, a=0.3, b=0.4, T0=1, m0=6)
+hand = per_step(lambda: neoclassicalSynthesisSolver.iterate_economy(
+    1.0, 1.0, 1, 2, 0.6, 1.0, 1, 2, 0.1, 1.0, 6, 5, 1.0, 0.4, 0.2, 1.0, 5, 2, 0.3, 4, 1, 0.4))
+step = NEOCLASSICAL_SYNTHESIS.bind(A=2, i0=2, M0=5, G0=1, P0=1, **params)
+state = (1.0,) * 9
+compiled = per_step(lambda: step(*state))
+batch = tuple(np.ones(S) for _ in state)
+batched = per_step(lambda: step(*batch), number=200)
+report("Neoclassical synthesis", hand, compiled, batched,
+       np.allclose(step(*state), neoclassicalSynthesisSolver.iterate_economy(
+           1.0, 1.0, 1, 2, 0.6, 1.0, 1, 2, 0.1, 1.0, 6, 5, 1.0, 0.4, 0.2, 1.0, 5, 2, 0.3, 4, 1, 0.4)))
+
+print()
+print("Generated step function of the neoclassical model:")
+print(NEOCLASSICAL.source())
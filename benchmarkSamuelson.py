@@ -0,0 +1,43 @@
+import time
+import numpy as np
+
+from samuelsonSolver import solve_samuelson, solve_samuelson_loop
+
+##################
+# Benchmark: scalar loop vs. vectorized Samuelson solver
+##################
+# Problem size
+S = 10000
+Q = 1000
+
+# Set the period in which a shock or shift in 'an' will occur
+s = 15
+
+# Set fixed parameter values
+c1 = 0.8
+beta = 0.6
+
+# Spread G0 shocks over the scenarios so every row is different
+G0 = np.ones((S, Q))*5
+G0[:, s:Q] += np.linspace(0, 1, S)[:, None]
+
+def fresh_state():
+    return np.ones((S, Q)), np.ones((S, Q))
+
+# Scalar loop
+C_loop, I_loop = fresh_state()
+start = time.perf_counter()
+C_loop, I_loop = solve_samuelson_loop(C_loop, I_loop, G0, c1, beta)
+loop_time = time.perf_counter() - start
+
+# Vectorized
+C_vec, I_vec = fresh_state()
+start = time.perf_counter()
+C_vec, I_vec = solve_samuelson(C_vec, I_vec, G0, c1, beta)
+vec_time = time.perf_counter() - start
+
+print("S = " + str(S) + ", Q = " + str(Q))
+print("loop:       " + str(round(loop_time, 3)) + " s")
+print("vectorized: " + str(round(vec_time, 3)) + " s")
+print("speedup:    " + str(round(loop_time / vec_time, 1)) + "x")
+print("identical:  " + str(np.array_equal(C_loop, C_vec) and np.array_equal(I_loop, I_vec)))
@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from functools import partial
+
+# Render off-screen, no window needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+import lewisModel
+import neoclassicalSolver
+import neoclassicalSynthesisSolver
+import samuelsonSolver
+import samuelsonStream
+
+##################
+# Benchmark suite: every model kernel at several problem sizes, and the
+# chart pipeline of the pygame scripts. Results are written as JSON and can
+# be compared against a stored baseline.
+#
+# python benchmarkSuite.py --output baseline.json
+# python benchmarkSuite.py --compare baseline.json
+#
+# Every case is timed with timeit: the number of calls per sample is
+# calibrated to take at least 0.2 s, and the best of `repeat` samples is
+# compared (the least noisy estimate of the cost on an idle machine).
+##################
+DEFAULT_OUTPUT = "benchmark_results.json"
+REPEAT = 5
+
+##################
+# Samuelson multiplier-accelerator, S scenarios x Q periods
+##################
+def samuelson_case(solve, S, Q):
+    c1, beta = 0.8, 0.6
+    G0 = np.ones((S, Q)) * 5
+    G0[:, 15:] += np.linspace(0, 1, S)[:, None]
+
+    def run():
+        solve(np.ones((S, Q)), np.ones((S, Q)), G0, c1, beta)
+    return run
+
+
+def samuelson_stream_case(S, Q, chunk):
+    G0 = [(0, 5.0), (15, 5 + np.linspace(0, 1, S))]
+
+    def run():
+        samuelsonStream.run_stream(samuelsonStream.stream_samuelson(1.0, 1.0, G0, 0.8, 0.6, Q, chunk))
+    return run
+
+
+##################
+# Neoclassical macro model, `steps` iterations of S scenarios at once
+# (S = 1 is the scalar loop of the pygame script)
+##################
+def neoclassical_case(S, steps):
+    A, leisure, G0, Yf, M0 = (np.full(S, x) for x in (2.0, 0.4, 1.0, 1.0, 5.0))
+    i = 0 if S == 1 else slice(None)
+    start = 1.0 if S == 1 else np.ones(S)
+
+    def run():
+        # Bound once, as in the solvers
+        step = neoclassicalSolver.make_step(i, A, 0.3, 5, leisure, 0.9, 0.6, G0, Yf, 1, M0, 0.02)
+        state = (start,) * 8
+        for t in range(steps):
+            state = step(*state)
+    return run
+
+
+##################
+# Neoclassical synthesis model, `steps` iterations of S scenarios at once
+##################
+def synthesis_case(S, steps):
+    A, i0, M0, G0, P0 = (np.full(S, x) for x in (2.0, 2.0, 5.0, 1.0, 1.0))
+    if S == 1:
+        A, i0, M0, G0, P0 = (x[0] for x in (A, i0, M0, G0, P0))
+    start = 1.0 if S == 1 else np.ones(S)
+
+    def run():
+        # Bound once, as in the solvers
+        step = neoclassicalSynthesisSolver.make_step(G0, 2, 0.6, 1, i0, 0.1, 6, M0, 0.4, 0.2, 5, A, 0.3, 4, P0, 0.4)
+        state = (start,) * 9
+        for t in range(steps):
+            state = step(*state)
+    return run
+
+
+##################
+# Lewis dual economy, `steps` iterations (scalar only: the kernel branches
+# on L1 < lambda)
+##################
+LEWIS_RESTART = 400  # Sector 1 employment turns negative after ~435 periods
+
+def lewis_case(steps):
+    def run():
+        for t in range(steps):
+            if t % LEWIS_RESTART == 0:
+                Y1, w2, Y2, K, P2, L2, L1 = 1, 1, 1, 10, 1, 2.0, 18.0
+            Y1, w2, Y2, K, P2, L2, L1 = lewisModel.iterate_economy(L1, 10, 0.7, 0.2, L2, 1, 1, 0.7, K, P2, w2, 20)
+    return run
+
+
+##################
+# Chart pipeline: one chart update and its pygame surface for a series of
+# `history` points, as in every step of the pygame scripts
+##################
+def chart_case(kind, history):
+    import pygame
+    from pygameCharts import LineChart, PygameLineChart
+
+    pygame.font.init()
+    chart = (LineChart if kind == "agg" else PygameLineChart)("Benchmark: Output", "Y")
+    series = np.sin(np.arange(history) / 10.0)
+    plot_min = max(0, history - 100)
+
+    def run():
+        chart.update(series, plot_min, history)
+        chart.render()
+    return run
+
+
+def size_name(size):
+    return "[" + ",".join(key + "=" + str(value) for key, value in size.items()) + "]"
+
+
+# name: (make the case, problem size, work units per call, unit)
+CASES = {}
+for S, Q in ((10, 100), (100, 1000)):
+    CASES["samuelson.loop" + size_name({"S": S, "Q": Q})] = (
+        partial(samuelson_case, samuelsonSolver.solve_samuelson_loop, S, Q), {"S": S, "Q": Q}, S * Q, "period")
+for S, Q in ((10, 100), (100, 1000), (10000, 1000)):
+    CASES["samuelson.vectorized" + size_name({"S": S, "Q": Q})] = (
+        partial(samuelson_case, samuelsonSolver.solve_samuelson, S, Q), {"S": S, "Q": Q}, S * Q, "period")
+    CASES["samuelson.stream" + size_name({"S": S, "Q": Q})] = (
+        partial(samuelson_stream_case, S, Q, 64), {"S": S, "Q": Q}, S * Q, "period")
+for S, steps in ((1, 1000), (100, 100), (10000, 100)):
+    size = {"S": S, "steps": steps}
+    CASES["neoclassical" + size_name(size)] = (partial(neoclassical_case, S, steps), size, S * steps, "step")
+    CASES["synthesis" + size_name(size)] = (partial(synthesis_case, S, steps), size, S * steps, "step")
+for steps in (100, 1000, 10000):
+    CASES["lewis" + size_name({"steps": steps})] = (partial(lewis_case, steps), {"steps": steps}, steps, "step")
+for kind, lengths in (("agg", (100, 1000)), ("pygame", (100, 1000, 10000))):
+    for points in lengths:
+        CASES["chart." + kind + size_name({"points": points})] = (
+            partial(chart_case, kind, points), {"points": points}, 1, "frame")
+
+
+def measure(run, repeat=REPEAT):
+    '''
+    Best and median seconds per call of run(), and the calls per sample
+    '''
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return min(samples), float(np.median(samples)), number
+
+
+def run_suite(names, repeat=REPEAT):
+    '''
+    Time the named cases; returns the results as stored in the JSON file
+    '''
+    results = {}
+    for name in names:
+        make, size, units, unit = CASES[name]
+        best, median, number = measure(make(), repeat)
+        results[name] = {"size": size,
+                         "best_s": best,
+                         "median_s": median,
+                         "number": number,
+                         "repeat": repeat,
+                         "ns_per_" + unit: best / units * 1e9}
+        print(name.ljust(40) + format_time(best).rjust(12) + format_time(median).rjust(12) +
+              ("%.1f ns/" % (best / units * 1e9) + unit).rjust(20))
+    return results
+
+
+def compare(results, baseline, threshold):
+    '''
+    Print the change of every case against the baseline; returns the names
+    of the cases slower than the baseline by more than threshold (0.1 = 10%)
+    '''
+    regressions = []
+    print()
+    print("case".ljust(40) + "baseline".rjust(12) + "now".rjust(12) + "ratio".rjust(10))
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(name.ljust(40) + "new".rjust(12) + format_time(result["best_s"]).rjust(12))
+            continue
+        ratio = result["best_s"] / old["best_s"]
+        verdict = ""
+        if ratio > 1 + threshold:
+            verdict = "  SLOWER"
+            regressions.append(name)
+        elif ratio < 1 / (1 + threshold):
+            verdict = "  faster"
+        print(name.ljust(40) + format_time(old["best_s"]).rjust(12) + format_time(result["best_s"]).rjust(12) +
+              ("%.2fx" % ratio).rjust(10) + verdict)
+    return regressions
+
+
+def format_time(seconds):
+    for scale, unit in ((1, "s"), (1e-3, "ms"), (1e-6, "us")):
+        if seconds >= scale:
+            return "%.3f %s" % (seconds / scale, unit)
+    return "%.1f ns" % (seconds * 1e9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the model kernels and the chart pipeline")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON file for the results")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown counted as a regression in --compare (default 0.1 = 10%%)")
+    parser.add_argument("--filter", default="", help="only run the cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="samples per case")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    # Read the baseline first, it may be the file the results go to
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print("case".ljust(40) + "best".rjust(12) + "median".rjust(12) + "per unit".rjust(20))
+    results = run_suite(names, args.repeat)
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": sys.version.split()[0],
+              "numpy": np.__version__,
+              "platform": platform.platform(),
+              "processor": platform.processor() or platform.machine(),
+              "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Wrote " + args.output)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(str(len(regressions)) + " case(s) slower than the baseline by more than " +
+                  str(round(args.threshold * 100)) + "%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import numpy as np
+
+##################
+# Accelerated fixed-point iteration
+# Every model here is solved by repeating an update map x -> F(x) (one call
+# of iterate_economy) until nothing changes. The accelerators below take
+# the same map and propose a better next point than F(x) itself.
+##################
+
+class PlainIteration:
+    '''
+    Sequential substitution: the next point is F(x)
+    '''
+    extra_calls = 0  # Calls of the update map made by propose
+    def propose(self, x, g, update):
+        return g
+
+    def reset(self):
+        pass
+
+
+class DampedRelaxation:
+    '''
+    Damped relaxation: the next point is x + omega * (F(x) - x)
+    omega: Relaxation weight, below 1 damps oscillations
+    '''
+    extra_calls = 0
+    def __init__(self, omega=0.5):
+        self.omega = omega
+
+    def propose(self, x, g, update):
+        return x + self.omega * (g - x)
+
+    def reset(self):
+        pass
+
+
+class AitkenDeltaSquared:
+    '''
+    Componentwise Aitken delta-squared extrapolation from x, F(x), F(F(x)).
+    Costs one extra call of the update map per step.
+    '''
+    extra_calls = 1
+    def propose(self, x, g, update):
+        x2 = update(g)
+        d1 = g - x
+        d2 = x2 - g
+        denom = d2 - d1
+        safe = np.abs(denom) > 1e-300
+        return np.where(safe, x2 - d2**2 / np.where(safe, denom, 1), x2)
+
+    def reset(self):
+        pass
+
+
+class AndersonMixing:
+    '''
+    Anderson mixing of depth m: combines the last m iterates so that the
+    linearized residual is as small as possible
+    m: Number of previous iterates to mix
+    '''
+    extra_calls = 0
+    def __init__(self, m=5):
+        self.m = m
+        self.reset()
+
+    def propose(self, x, g, update):
+        f = g - x
+        if self.f_prev is not None:
+            self.dF.append(f - self.f_prev)
+            self.dG.append(g - self.g_prev)
+            if len(self.dF) > self.m:
+                self.dF.pop(0)
+                self.dG.pop(0)
+        self.f_prev, self.g_prev = f, g
+
+        if not self.dF:
+            return g
+
+        dF = np.column_stack(self.dF)
+        dG = np.column_stack(self.dG)
+        gamma = np.linalg.lstsq(dF, f, rcond=None)[0]
+        return g - dG @ gamma
+
+    def reset(self):
+        self.dF = []
+        self.dG = []
+        self.f_prev = None
+        self.g_prev = None
+
+
+ACCELERATORS = {
+    "plain": PlainIteration,
+    "damped": DampedRelaxation,
+    "aitken": AitkenDeltaSquared,
+    "anderson": AndersonMixing,
+}
+
+def make_accelerator(name, **options):
+    '''
+    Build an accelerator by name, so the method can be picked at runtime
+    name: One of "plain", "damped", "aitken" or "anderson"
+    options: Passed to the accelerator (omega for damped, m for anderson)
+    '''
+    if name not in ACCELERATORS:
+        raise ValueError("unknown accelerator " + repr(name) + ", expected one of " +
+                         ", ".join(ACCELERATORS))
+    return ACCELERATORS[name](**options)
+
+
+class FixedPointResult:
+    '''
+    Outcome of an accelerated fixed-point solve
+    x: Final point
+    iterations: Number of calls of the update map
+    residual: Max absolute value of F(x) - x at the final point
+    converged: Whether residual fell below the tolerance within the iteration cap
+    fallbacks: Number of accelerated steps rejected in favour of a plain step
+    '''
+    def __init__(self, x, iterations, residual, converged, fallbacks):
+        self.x = x
+        self.iterations = iterations
+        self.residual = residual
+        self.converged = converged
+        self.fallbacks = fallbacks
+
+    def __repr__(self):
+        return ("FixedPointResult(iterations=" + str(self.iterations) + ", residual=" +
+                str(self.residual) + ", converged=" + str(self.converged) + ", fallbacks=" +
+                str(self.fallbacks) + ")")
+
+
+def solve_fixed_point(update, x0, accelerator="anderson", tol=1e-10, max_iter=1000,
+                      growth=10, **options):
+    '''
+    Find x with F(x) = x, stepping with the chosen accelerator. An accelerated
+    step is rejected, and a plain step F(x) taken instead, when it produces a
+    non-finite residual or one more than growth times the current residual.
+    update: The update map F, taking and returning a 1-d array
+    x0: Starting point
+    accelerator: Accelerator name (see make_accelerator) or instance; an
+                 instance making calls of its own in propose declares them
+                 as extra_calls
+    tol: Tolerance on max |F(x) - x|
+    max_iter: Cap on the number of calls of the update map (never exceeded)
+    growth: Residual growth factor that counts as divergence
+    options: Passed to make_accelerator
+    '''
+    if isinstance(accelerator, str):
+        accelerator = make_accelerator(accelerator, **options)
+    accelerator.reset()
+
+    calls = [0]
+    def counted_update(x):
+        calls[0] += 1
+        with np.errstate(all="ignore"):
+            return np.asarray(update(x), dtype=float)
+
+    def residual_of(x, g):
+        with np.errstate(all="ignore"):
+            res = np.max(np.abs(g - x))
+        return res if np.isfinite(res) else np.inf
+
+    x = np.asarray(x0, dtype=float)
+    g = counted_update(x)
+    residual = residual_of(x, g)
+    fallbacks = 0
+
+    # A step calls the map once for the new residual, plus the accelerator's
+    # own calls; only start one that fits in the budget
+    step_calls = 1 + getattr(accelerator, "extra_calls", 0)
+    while residual >= tol and calls[0] + step_calls <= max_iter:
+        candidate = accelerator.propose(x, g, counted_update)
+        g_candidate = counted_update(candidate)
+        candidate_residual = residual_of(candidate, g_candidate)
+
+        accelerated = candidate is not g
+        if accelerated and candidate_residual > growth * residual:
+            # The accelerated step diverged: take the plain step instead and
+            # let the accelerator start over from there
+            accelerator.reset()
+            fallbacks += 1
+            if calls[0] >= max_iter:
+                # No call left for the plain step: keep the current point
+                break
+            candidate = g
+            g_candidate = counted_update(candidate)
+            candidate_residual = residual_of(candidate, g_candidate)
+
+        x, g, residual = candidate, g_candidate, candidate_residual
+
+    return FixedPointResult(x, calls[0], residual, residual < tol, fallbacks)
@@ -0,0 +1,129 @@
+import json
+import time
+
+import numpy as np
+
+from ringBuffer import RingBuffer
+
+##################
+# Per-stage frame timing for the pygame scripts
+# Each frame is split into named stages (event polling, the economy step,
+# text, charts, pushing to the display, ...) timed with perf_counter_ns.
+# The last `window` frames are kept for rolling percentiles, which can be
+# shown in an overlay, and a per-stage summary can be saved as JSON.
+##################
+
+class FrameProfiler:
+    '''
+    Times the stages of every frame
+    stages: Names of the stages, in display order; the whole frame is
+            recorded as "frame" on top of these
+    window: Number of frames the rolling p50/p95/max are taken over
+    '''
+    def __init__(self, stages, window=600):
+        self.stages = tuple(stages)
+        self.history = RingBuffer(self.stages + ("frame",), window)
+        self.frames = 0
+        self.current = dict.fromkeys(self.stages, 0)  # ns spent in this frame so far
+        self.totals = dict.fromkeys(self.history.names, 0)  # ns over the whole run
+        self.peaks = dict.fromkeys(self.history.names, 0)
+        self.frame_start = time.perf_counter_ns()
+        self._timers = {name: _StageTimer(self.current, name) for name in self.stages}
+        self._overlay = None
+        self._overlay_frame = None
+
+    def stage(self, name):
+        '''
+        Context manager timing a stage; a stage entered several times in a
+        frame is summed: `with profiler.stage("economy"): ...`
+        name: Name of the stage
+        '''
+        return self._timers[name]
+
+    def end_frame(self):
+        '''
+        Close the current frame and start the next one
+        '''
+        now = time.perf_counter_ns()
+        values = [self.current[name] for name in self.stages] + [now - self.frame_start]
+        self.frame_start = now
+        self.history.append(*values)
+        for name, ns in zip(self.history.names, values):
+            self.totals[name] += ns
+            if ns > self.peaks[name]:
+                self.peaks[name] = ns
+        for name in self.stages:
+            self.current[name] = 0
+        self.frames += 1
+
+    def summary(self):
+        '''
+        Per-stage statistics in milliseconds: p50, p95 and max over the
+        rolling window, and the mean and max over the whole run
+        '''
+        stats = {}
+        for name in self.history.names:
+            recent = self.history.window(name) / 1e6
+            p50, p95 = np.percentile(recent, (50, 95)) if len(recent) else (0.0, 0.0)
+            stats[name] = {"p50_ms": float(p50),
+                           "p95_ms": float(p95),
+                           "max_ms": float(recent.max()) if len(recent) else 0.0,
+                           "mean_ms_run": self.totals[name] / max(self.frames, 1) / 1e6,
+                           "max_ms_run": self.peaks[name] / 1e6}
+        return stats
+
+    def save(self, path):
+        '''
+        Write the summary to a JSON file
+        path: File name
+        '''
+        with open(path, "w") as f:
+            json.dump({"frames": self.frames, "window": len(self.history), "stages": self.summary()}, f, indent=2)
+        print("Wrote frame timings to " + path)
+
+    def overlay(self, font, color, background, every=15):
+        '''
+        Surface with a table of the rolling p50/p95/max of every stage,
+        recomputed only every `every` frames so the overlay itself stays cheap
+        font: pygame font (a monospaced one lines the columns up)
+        color: Text color
+        background: Background color of the table
+        '''
+        if self._overlay is not None and self.frames - self._overlay_frame < every:
+            return self._overlay
+        import pygame
+
+        lines = ["ms".ljust(10) + "".join(column.rjust(8) for column in ("p50", "p95", "max"))]
+        for name, stats in self.summary().items():
+            lines.append(name.ljust(10) + "".join(("%.2f" % stats[key]).rjust(8)
+                                                 for key in ("p50_ms", "p95_ms", "max_ms")))
+        rows = [font.render(line, True, color) for line in lines]
+        height = font.get_linesize()
+        surf = pygame.Surface((max(row.get_width() for row in rows) + 10, height * len(rows) + 10))
+        surf.fill(background)
+        for k, row in enumerate(rows):
+            surf.blit(row, (5, 5 + k * height))
+
+        self._overlay = surf
+        self._overlay_frame = self.frames
+        return surf
+
+
+class _StageTimer:
+    '''
+    Adds the time spent inside the with block to times[name]
+    '''
+    __slots__ = ("times", "name", "start")
+
+    def __init__(self, times, name):
+        self.times = times
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.times[self.name] += time.perf_counter_ns() - self.start
+        return False
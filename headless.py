@@ -0,0 +1,156 @@
+import argparse
+import csv
+import os
+import sys
+
+##################
+# Headless batch mode for the pygame scripts
+# python lewisModelPygame.py --headless --steps 1000 --keys 100:w,200:s --output lewis.csv
+#
+# The script runs on SDL's dummy video driver (no window or display
+# needed), its event queue is replaced by a scripted sequence of key
+# presses (one space bar per step, plus the parameter keys at the given
+# periods), the frame rate is not capped, and the time series of every
+# scenario are written to a CSV file at the end. Frames can be saved too.
+##################
+
+class HeadlessRun:
+    '''
+    A scripted, display-less run of one of the pygame scripts
+    steps: Number of steps per scenario
+    keys: Dict of (scenario, period) or period: list of key names pressed
+          before that period's step (scenario numbers start at 1)
+    output: CSV file for the time series, or None
+    frames: Directory to save frames in, or None
+    frame_every: Save a frame every this many periods
+    scenario_key: Key that ends a scenario in scripts with several
+                  scenarios (None when the script has only one)
+    '''
+    MAX_WAIT = 100  # Frames without a step before a scenario is given up
+
+    def __init__(self, steps, keys=None, output=None, frames=None, frame_every=1, scenario_key=None):
+        self.steps = steps
+        self.keys = keys or {}
+        self.output = output
+        self.frames = frames
+        self.frame_every = frame_every
+        self.scenario_key = scenario_key
+
+        self.rows = []
+        self.names = None
+        self.scenario = None
+        self.period = 0
+        self.sent = None  # (scenario, period) whose events were sent last
+        self.waiting = 0  # Frames since then
+        self.saved = None  # (scenario, period) of the last frame saved
+
+        # No window, no display needed
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        if frames is not None:
+            os.makedirs(frames, exist_ok=True)
+
+    @classmethod
+    def from_args(cls, scenario_key=None, argv=None):
+        '''
+        HeadlessRun from the command line of the script, or None when the
+        script is run interactively (without --headless). Call before
+        pygame.init().
+        scenario_key: Name of the key that ends a scenario, e.g. "q"
+        '''
+        parser = argparse.ArgumentParser(description="Run the model without a display")
+        parser.add_argument("--headless", action="store_true", help="run without a window")
+        parser.add_argument("--steps", type=int, default=100, help="steps per scenario (default 100)")
+        parser.add_argument("--keys", default="",
+                            help="key presses as period:key or scenario/period:key, comma separated "
+                                 "(e.g. 10:w,10:w,2/50:r)")
+        parser.add_argument("--output", help="CSV file for the time series")
+        parser.add_argument("--frames", help="directory to save frames in")
+        parser.add_argument("--frame-every", type=int, default=1, help="save every n-th period's frame")
+        args, _ = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+        if not args.headless:
+            return None
+
+        return cls(args.steps, parse_keys(args.keys), args.output, args.frames, args.frame_every,
+                   scenario_key)
+
+    def record(self, scenario, period, **values):
+        '''
+        Record the state of a scenario (0-based, as sim_no) in a period
+        '''
+        if self.names is None:
+            self.names = list(values)
+        if scenario != self.scenario:
+            self.waiting = 0
+        self.scenario = scenario
+        self.period = period
+        self.rows.append([scenario + 1, period] + [float(values[name]) for name in self.names])
+
+    def events(self):
+        '''
+        This frame's events, used in place of pygame.event.get()
+        '''
+        import pygame
+
+        scenario = 0 if self.scenario is None else self.scenario
+        if self.sent == (scenario, self.period):
+            # The step has not happened yet (e.g. the script is still
+            # drawing); give up on a scenario that stopped stepping
+            self.waiting += 1
+            if self.waiting < self.MAX_WAIT:
+                return []
+            if self.waiting == self.MAX_WAIT:
+                print("Scenario " + str(scenario + 1) + " stopped at period " + str(self.period))
+
+        if self.period >= self.steps or self.waiting >= self.MAX_WAIT:
+            if self.scenario_key is None:
+                return [pygame.event.Event(pygame.QUIT)]
+            # Move on to the next scenario; after the last one the script ends
+            return [pygame.event.Event(pygame.KEYDOWN, key=pygame.key.key_code(self.scenario_key))]
+
+        self.sent = (scenario, self.period)
+        self.waiting = 0
+
+        names = self.keys.get(self.period, []) + self.keys.get((scenario + 1, self.period), [])
+        return ([pygame.event.Event(pygame.KEYDOWN, key=pygame.key.key_code(name)) for name in names] +
+                [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)])
+
+    def save_frame(self, screen):
+        '''
+        Save the screen if frames are wanted for the current period
+        '''
+        current = (self.scenario, self.period)
+        if self.frames is None or self.period % self.frame_every or current == self.saved:
+            return
+        import pygame
+
+        self.saved = current
+        name = "frame_" + str(self.scenario + 1) + "_" + str(self.period).zfill(6) + ".png"
+        pygame.image.save(screen, os.path.join(self.frames, name))
+
+    def finish(self):
+        '''
+        Write the recorded time series
+        '''
+        if self.output is None or self.names is None:
+            return
+        with open(self.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["scenario", "period"] + self.names)
+            writer.writerows(self.rows)
+        print("Wrote " + str(len(self.rows)) + " rows to " + self.output)
+
+
+def parse_keys(text):
+    '''
+    Parse "10:w,10:w,2/50:r" into {10: ["w", "w"], (2, 50): ["r"]}
+    '''
+    keys = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        when, name = item.split(":")
+        if "/" in when:
+            scenario, period = when.split("/")
+            when = (int(scenario), int(period))
+        else:
+            when = int(when)
+        keys.setdefault(when, []).append(name)
+    return keys
@@ -3,15 +3,25 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Construct auxiliary Jacobian matrix for 4 variables
+from modelGraph import block_ordering
+from modelSpec import ModelSpec
+
+# Samuelson model within one period: lagged output is taken as current
+# output, and last period's consumption C_lag is predetermined, so it
+# enters as exogenous (investment is beta * (C_t - C_{t-1}))
+samuelson = ModelSpec("Samuelson (within period)",
+                      [("Y", "C + I + G0"),
+                       ("C", "c1 * Y"),
+                       ("I", "beta * (C - C_lag)")],
+                      parameters=("c1", "beta"),
+                      exogenous=("G0", "C_lag"))
+
+# Construct auxiliary Jacobian matrix for 5 variables
   # endogenous: (1) Y, (2) C, (3) I
-  # exogenous: (4) G0
+  # exogenous: (4) G0, (5) C_lag
 # where non-zero elements in regular Jacobian are set to 1 and zero elements are
-# unchanged
-M_mat = np.array([[0, 1, 1, 1],
-         [1, 0, 0, 0],
-         [0, 1, 0, 0],
-         [0, 0, 0, 0]])
+# unchanged, read off the equations
+M_mat = samuelson.auxiliary_jacobian(exogenous=True)
 
 # Create adjacency matrix from transpose of auxiliary Jacobian and add column names
 A_mat = M_mat.transpose()
@@ -20,7 +30,13 @@ A_mat = M_mat.transpose()
 G = nx.DiGraph(A_mat)
 
 # Define node labels
-nodelabs = {0: "Y", 1: "C", 2: "I", 3: "$G_0$"}
+nodelabs = {0: "Y", 1: "C", 2: "I", 3: "$G_0$", 4: "$C_{t-1}$"}
+
+# Block-triangular ordering of the equations: only the simultaneous blocks
+# need to be solved iteratively, the others are evaluated once in order
+for members, simultaneous in block_ordering(M_mat):
+    kind = "simultaneous" if simultaneous else "recursive" if M_mat[members].any() else "exogenous"
+    print(kind + ": " + ", ".join(nodelabs[j] for j in members))
 
 # Plot the directed graph
 pos = nx.spring_layout(G, seed=42)  
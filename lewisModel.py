@@ -0,0 +1,43 @@
+##################
+# Lewis (1954) dual economy model
+##################
+
+def iterate_economy(L1, lambda_val, alpha, gamma, L2, w1, rho, beta, K, P2, w2, L):
+    '''
+    L1: Employment in sector 1 (traditional)
+    lambda_val: Employment at which MPL in sector 1 becomes zero
+    alpha: Labour elasticity of output, sector 1
+    gamma: Labour supply coefficient, sector 2
+    L2: Employment in sector 2 (modern)
+    w1: Subsistence real wage sector 1
+    rho: Wage premium
+    beta: Labour elasticity of output, sector 2
+    K: Capital stock (only in sector 2)
+    P2: Profits in sector 2
+    w2: Real wage sector 2
+    L: Total labour supply (exogenous)
+    '''
+    # Model equations
+    # Output sector1 and wages sector 2
+    Y1 = lambda_val ** alpha
+    w2 = w1 + rho
+    if L1 < lambda_val:
+        Y1 = L1 ** alpha
+        w2 = gamma * L2
+
+    # Output sector 2
+    Y2 = (L2 ** beta) * (K ** (1 - beta))
+
+    # Capital accumulation sector 2
+    K = K + P2
+
+    # Profits sector 2
+    P2 = Y2 - w2 * L2
+
+    # Employment sector 2
+    L2 = (beta * Y2) / w2
+
+    # Employment sector 1
+    L1 = L - L2
+
+    return Y1, w2, Y2, K, P2, L2, L1
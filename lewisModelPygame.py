@@ -1,9 +1,21 @@
 import pygame
 import math
 
+from lewisModel import iterate_economy
+from ringBuffer import RingBuffer
+from pygameText import TextCache, TextField
+from renderScheduler import RenderScheduler
+from simulationClock import SimulationClock
+from pygameCharts import PygameLineChart, export_charts
+from headless import HeadlessRun
+
 ##################
 # pygame setup
 ##################
+# --headless runs a scripted batch without a window (see headless.py)
+headless = HeadlessRun.from_args()
+get_events = pygame.event.get if headless is None else headless.events
+
 pygame.init()
 screen = pygame.display.set_mode((1280, 780))
 clock = pygame.time.Clock()
@@ -15,18 +27,9 @@ my_font = pygame.font.SysFont('Comic Sans MS', 14)
 font_color = (0, 0, 0)
 
 soft_blue = pygame.Color(173, 216, 230)  # R: 173, G: 216, B: 230
-##################
-
-##################
-# Matplotlib setup
-# Within pygame, see article here:
-# https://stackoverflow.com/questions/48093361/using-matplotlib-in-pygame
-##################
-import matplotlib
-matplotlib.use("Agg")
 
-import matplotlib.backends.backend_agg as agg
-import matplotlib.pyplot as plt
+# Only changed regions of the screen are redrawn
+scheduler = RenderScheduler(screen, soft_blue)
 ##################
 
 ##################
@@ -67,263 +70,173 @@ L2 = L - L1
 # https://macrosimulation.org/a_neoclassical_synthesis_model_is_lm_as_ad#directed-graph
 ##################
 
-def iterate_economy(L1, lambda_val, alpha, gamma, L2, w1, rho, beta, K, P2, w2, L):
-    # Model equations
-    # Output sector1 and wages sector 2
-    Y1 = lambda_val ** alpha
-    w2 = w1 + rho
-    if L1 < lambda_val:
-        Y1 = L1 ** alpha
-        w2 = gamma * L2
-
-    # Output sector 2
-    Y2 = (L2 ** beta) * (K ** (1 - beta))
-
-    # Capital accumulation sector 2
-    K = K + P2
-
-    # Profits sector 2
-    P2 = Y2 - w2 * L2
-
-    # Employment sector 2
-    L2 = (beta * Y2) / w2
-
-    # Employment sector 1
-    L1 = L - L2
-
-    return Y1, w2, Y2, K, P2, L2, L1
-
-
 # Enable this to automatically iterate
 AUTO_ITERATIOM = True
-if (AUTO_ITERATIOM):
-    # Set an automatic iteration event every 500 miliseconds 
-    pygame.time.set_timer(pygame.USEREVENT, 500)
+
+# Simulation speed, independent of the frame rate: steps per second when
+# iterating automatically (2 = one step every 500 ms), or None for as many
+# steps as fit in each frame. x toggles turbo (as fast as possible), the
+# up and down arrows double and halve the speed.
+STEPS_PER_SECOND = 2
+FPS = 30
+if headless is not None:
+    AUTO_ITERATIOM = False  # Steps come from the scripted space bar presses
+    FPS = 0  # Uncapped
+sim_clock = SimulationClock(STEPS_PER_SECOND if AUTO_ITERATIOM else 0, frame_budget=0.7 / FPS if FPS else 0.025)
 
 # Maximum number of iterations to display in each graph
 MAX_PLOT_LENGTH = 100
 
 # Count number of iterations for this simulation
 iteration_count = 0
-is_iter = False
 
-# Used for plotting the simulation over time
-Y1_time = []
-Y2_time = []
-L1_time = []
-L2_time = []
-P2_time = []
+# Used for plotting the simulation over time; only the periods on screen are kept.
+# The charts always show the last MAX_PLOT_LENGTH periods (as the x limits did
+# when the whole series was plotted), also in turbo mode: after a burst of
+# thousands of steps they show the latest 100, not the run so far.
+history = RingBuffer(("Y1", "Y2", "L1", "L2", "P2"), MAX_PLOT_LENGTH + 1)
 
 # Append initial value
-Y1_time.append(Y1)
-Y2_time.append(Y2)
-L1_time.append(L1)
-L2_time.append(L2)
-P2_time.append(P2)
+history.append(Y1, Y2, L1, L2, P2)
+if headless is not None:
+    headless.record(0, iteration_count, Y1=Y1, w2=w2, Y2=Y2, K=K, P2=P2, L2=L2, L1=L1, w1=w1)
 
-# graph images to render
+# graph images to render, and whether they changed since last shown
+charts_changed = False
 Y1_surf = None
 Y2_surf = None
 L1_surf = None
 L2_surf = None
 P2_surf = None
 
+# Charts of the simulation, created once and updated every step; p saves them as PNG
+Y1_chart = PygameLineChart(scenario_name + ": Output Y1", "Y1")
+Y2_chart = PygameLineChart(scenario_name + ": Output Y2", "Y2")
+L1_chart = PygameLineChart(scenario_name + ": Labor 1", "Labor 1")
+L2_chart = PygameLineChart(scenario_name + ": Labor 2", "Labor 2")
+P2_chart = PygameLineChart(scenario_name + ": Profits 2", "Profits 2")
+charts = {"Y1": Y1_chart,
+          "Y2": Y2_chart,
+          "L1": L1_chart,
+          "L2": L2_chart,
+          "P2": P2_chart}
+
+# Text surfaces: static labels are rendered once, the numeric fields only
+# when their displayed value changes
+text_cache = TextCache()
+iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, font_color)
+sim_text_surface = my_font.render(scenario_name, True, font_color)
+PS_text = TextField(text_cache, my_font, 'Sector 2 profit share: ', font_color)
+w1_text = TextField(text_cache, my_font, 'subsistence real wage: ', font_color)
+w2_text = TextField(text_cache, my_font, 'luxury real wage: ', font_color)
+iter_text = TextField(text_cache, my_font, 'Iteration number: ', font_color)
+
 # Current profit share
 PS = P2 / (Y1 + Y2)
 
 while running:
     # poll for events
     # pygame.QUIT event means the user clicked X to close your window
-    for event in pygame.event.get():
-        if event.type == pygame.USEREVENT:
-            is_iter = True
+    for event in get_events():
         if event.type == pygame.QUIT:
             running = False
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
                 print("Space bar pressed!")
-                is_iter = True
+                sim_clock.request()
+            if event.key == pygame.K_x:
+                sim_clock.toggle_turbo()
+                print("x pressed! Turbo " + ("on" if sim_clock.turbo else "off"))
+            if event.key == pygame.K_UP:
+                sim_clock.scale(2)
+                print("Up pressed! " + str(sim_clock.steps_per_second) + " steps per second")
+            if event.key == pygame.K_DOWN:
+                sim_clock.scale(0.5)
+                print("Down pressed! " + str(sim_clock.steps_per_second) + " steps per second")
             if event.key == pygame.K_w:
                 print("w pressed!")
                 w1 += 0.1
             if event.key == pygame.K_s:
                 print("s pressed!")
                 w1 -= 0.1
+            if event.key == pygame.K_p:
+                print("p pressed!")
+                export_charts(charts, "lewis_")
     
-    # Player has triggered an iteration
-    if is_iter:
+    # Run the simulation steps due in this frame (automatic or from the player).
+    # Once sector 1 employment falls below zero the model has no real
+    # solution (L1 ** alpha), so the simulation stops there.
+    sim_clock.start_frame(dt)
+    while L1 >= 0 and sim_clock.step():
          # Run economy updates
         Y1, w2, Y2, K, P2, L2, L1 = iterate_economy(L1, lambda_val, alpha, gamma, L2, w1, rho, beta, K, P2, w2, L)
-        
+        history.append(Y1, Y2, L1, L2, P2)
+        iteration_count += 1
+        if headless is not None:
+            headless.record(0, iteration_count, Y1=Y1, w2=w2, Y2=Y2, K=K, P2=P2, L2=L2, L1=L1, w1=w1)
+
+    # The display shows the state after the last step of the frame, and the
+    # charts are drawn once per frame however many steps ran
+    if sim_clock.steps > 0:
         # Calculate profit share of sector 2
         PS = P2 / (Y1 + Y2)
 
-        Y1_time.append(Y1)
-        Y2_time.append(Y2)
-        L1_time.append(L1)
-        L2_time.append(L2)
-        P2_time.append(P2)
-        iteration_count += 1
-
         ###########################
         plot_min = max(0, iteration_count - MAX_PLOT_LENGTH)
         plot_max = iteration_count
 
         # Rerender the graph images
-        # # Plot output 1
-        plt.plot(Y1_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Y1")
-        plt_title = scenario_name + ": Output Y1"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-        Y1_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        Y1_surf = pygame.transform.scale(Y1_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot output 2
-        plt.plot(Y2_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Y2")
-        plt_title = scenario_name + ": Output Y2"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-        Y2_surf = pygame.image.fromstring(raw_data, (size), "RGB")
-        Y2_surf = pygame.transform.scale(Y2_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot labor 1
-        plt.plot(L1_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Labor 1")
-        plt_title = scenario_name + ": Labor 1"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-
-        L1_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        L1_surf = pygame.transform.scale(L1_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot labor 2
-        plt.plot(L2_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Labor 2")
-        plt_title = scenario_name + ": Labor 2"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-
-        L2_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        L2_surf = pygame.transform.scale(L2_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot employment level
-        plt.plot(P2_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Profits 2")
-        plt_title = scenario_name + ": Profits 2"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-
-        P2_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        P2_surf = pygame.transform.scale(P2_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
+        Y1_chart.show(history.window("Y1"), plot_min, plot_max)
+        Y1_surf = Y1_chart.render()
+        Y2_chart.show(history.window("Y2"), plot_min, plot_max)
+        Y2_surf = Y2_chart.render()
+        L1_chart.show(history.window("L1"), plot_min, plot_max)
+        L1_surf = L1_chart.render()
+        L2_chart.show(history.window("L2"), plot_min, plot_max)
+        L2_surf = L2_chart.render()
+        P2_chart.show(history.window("P2"), plot_min, plot_max)
+        P2_surf = P2_chart.render()
+        charts_changed = True
         ##########################
-        
-        # Wait for next iteration from player
-        is_iter = False
     
-    # fill the screen with a color to wipe away anything from last frame
-    screen.fill(soft_blue)
-
     #########################
     # Update economic visuals
     #########################
     # Add simple text
-    iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, font_color)
-    sim_text_surface = my_font.render(scenario_name, True, font_color)
-    PS_text_surface = my_font.render('Sector 2 profit share: ' + str(PS), True, font_color)
-    w1_text_surface = my_font.render('subsistence real wage: ' + str(w1), True, font_color)
-    w2_text_surface = my_font.render('luxury real wage: ' + str(w2), True, font_color)
-    iter_text_surface = my_font.render('Iteration number: ' + str(iteration_count), True, font_color)
+    PS_text_surface = PS_text.render(PS)
+    w1_text_surface = w1_text.render(w1)
+    w2_text_surface = w2_text.render(w2)
+    iter_text_surface = iter_text.render(iteration_count)
 
     # Render text on the page at the specified positions
-    screen.blit(iterate_text_surface, (20, 10)) 
-    screen.blit(sim_text_surface, (20, 50)) 
-    screen.blit(PS_text_surface, (20, 80))
-    screen.blit(w1_text_surface, (20, 110))
-    screen.blit(w2_text_surface, (20, 140))
-    screen.blit(iter_text_surface, (20, 400)) 
+    scheduler.show("iterate_text", iterate_text_surface, (20, 10))
+    scheduler.show("sim_text", sim_text_surface, (20, 50))
+    scheduler.show("PS_text", PS_text_surface, (20, 80))
+    scheduler.show("w1_text", w1_text_surface, (20, 110))
+    scheduler.show("w2_text", w2_text_surface, (20, 140))
+    scheduler.show("iter_text", iter_text_surface, (20, 400))
 
     if (iteration_count > 0):
         #add the graph images to the screen
-        screen.blit(Y1_surf, (400,0))
-        screen.blit(Y2_surf, (800,0))
-        screen.blit(L1_surf, (400,360))
-        screen.blit(L2_surf, (800,360))
-        screen.blit(P2_surf, (0,420))
+        scheduler.show("Y1_chart", Y1_surf, (400,0), changed=charts_changed)
+        scheduler.show("Y2_chart", Y2_surf, (800,0), changed=charts_changed)
+        scheduler.show("L1_chart", L1_surf, (400,360), changed=charts_changed)
+        scheduler.show("L2_chart", L2_surf, (800,360), changed=charts_changed)
+        scheduler.show("P2_chart", P2_surf, (0,420), changed=charts_changed)
+        charts_changed = False
     ##########################
 
-    # flip() the display to put your work on screen
-    pygame.display.flip()
+    # Push only the changed regions to the display; frames in which nothing
+    # changed are skipped
+    scheduler.update()
+    if headless is not None:
+        headless.save_frame(screen)
 
     # limits FPS to 30
     # dt is delta time in seconds since last frame, used for framerate-
     # independent physics.
-    dt = clock.tick(30) / 1000
+    dt = clock.tick(FPS) / 1000
 
+if headless is not None:
+    headless.finish()
 pygame.quit()
\ No newline at end of file
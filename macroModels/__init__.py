@@ -0,0 +1,47 @@
+import importlib
+
+import samuelsonSolver as samuelson
+import neoclassicalSolver as neoclassical
+import neoclassicalSynthesisSolver as synthesis
+import lewisModel as lewis
+from shockSchedule import ShockSchedule
+from modelSpecs import SAMUELSON, LEWIS, NEOCLASSICAL, NEOCLASSICAL_SYNTHESIS
+
+##################
+# The model kernels as one importable package, for batch runs and parameter
+# sweeps that do not want a window:
+#
+#   import macroModels
+#   G0 = macroModels.ShockSchedule(S, 5)
+#   C, I = macroModels.samuelson.solve_samuelson(C, I, G0, c1, beta)
+#   result = macroModels.neoclassical.solve_equilibrium_newton(...)
+#
+# Importing it loads only NumPy. pygame, matplotlib and networkx are
+# imported on first use: the viewer modules below when they are first
+# accessed (macroModels.charts, ...), matplotlib when a matplotlib chart is
+# built, networkx when a model's block ordering is first computed.
+##################
+
+# Viewer and helper modules, imported when first accessed as attributes of
+# the package
+_VIEWERS = {"charts": "pygameCharts",
+            "text": "pygameText",
+            "scheduler": "renderScheduler",
+            "clock": "simulationClock",
+            "profiler": "frameProfiler",
+            "headless": "headless",
+            "graph": "modelGraph",
+            "sweep": "sweepRunner",
+            "store": "resultsStore",
+            "stream": "samuelsonStream"}
+
+def __getattr__(name):
+    if name in _VIEWERS:
+        module = importlib.import_module(_VIEWERS[name])
+        globals()[name] = module
+        return module
+    raise AttributeError("module 'macroModels' has no attribute '" + name + "'")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_VIEWERS))
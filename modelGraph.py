@@ -0,0 +1,105 @@
+import numpy as np
+
+##################
+# Structure of a model from its auxiliary Jacobian
+# M_mat[i, j] = 1 when the equation for variable i reads variable j, as in
+# jacobianGraphOfModel.py. Splitting the dependency graph into strongly
+# connected components gives a block-triangular order: each block only
+# reads variables from itself and from earlier blocks, so only the
+# simultaneous blocks need iterating and the rest are evaluated once.
+##################
+
+# Block orderings already computed, keyed by the auxiliary Jacobian
+_ordering_cache = {}
+
+def _networkx():
+    '''
+    networkx, imported on first use: the solvers only need it once per model
+    (the ordering is cached), so importing them stays cheap
+    '''
+    import networkx
+    return networkx
+
+
+def dependency_graph(M_mat):
+    '''
+    Directed graph with an edge j -> i whenever equation i reads variable j
+    M_mat: Auxiliary Jacobian
+    '''
+    return _networkx().DiGraph(np.asarray(M_mat).transpose())
+
+
+def block_ordering(M_mat):
+    '''
+    Strongly connected components of the dependency graph in block-triangular
+    order. Returns a list of (indices, simultaneous) pairs, where simultaneous
+    is True for blocks that have to be solved iteratively (more than one
+    variable, or a variable that reads itself).
+    M_mat: Auxiliary Jacobian
+    '''
+    M_mat = np.asarray(M_mat)
+    key = (M_mat.shape, M_mat.astype(bool).tobytes())
+    if key not in _ordering_cache:
+        nx = _networkx()
+        G = dependency_graph(M_mat)
+        condensed = nx.condensation(G)
+
+        blocks = []
+        for c in nx.lexicographical_topological_sort(condensed,
+                                                     key=lambda c: min(condensed.nodes[c]["members"])):
+            members = sorted(condensed.nodes[c]["members"])
+            simultaneous = len(members) > 1 or G.has_edge(members[0], members[0])
+            blocks.append((members, simultaneous))
+        _ordering_cache[key] = blocks
+
+    return _ordering_cache[key]
+
+
+def named_blocks(M_mat, names):
+    '''
+    block_ordering with variable names instead of indices
+    M_mat: Auxiliary Jacobian
+    names: Variable name of every row/column of M_mat
+    '''
+    return [([names[j] for j in members], simultaneous)
+            for members, simultaneous in block_ordering(M_mat)]
+
+
+def solve_block_recursive(equations, blocks, values, tol=1e-10, max_iter=1000):
+    '''
+    Solve a model block by block. Recursive blocks are evaluated once;
+    simultaneous blocks are iterated (Gauss-Seidel, in block order) until
+    their variables change by less than tol, or max_iter sweeps. Variables
+    without an equation (exogenous ones) are skipped.
+    Returns the updated values and the number of sweeps used per block.
+    equations: Dict of variable name -> function of the values dict
+    blocks: Output of named_blocks
+    values: Dict of starting values of the endogenous variables
+    tol: Tolerance on the max absolute change within a simultaneous block
+    max_iter: Cap on the number of sweeps of each simultaneous block
+    '''
+    values = dict(values)
+    sweeps = []
+
+    for names, simultaneous in blocks:
+        names = [name for name in names if name in equations]
+        if not names:
+            continue
+
+        if not simultaneous:
+            for name in names:
+                values[name] = equations[name](values)
+            sweeps.append(1)
+            continue
+
+        for sweep in range(1, max_iter + 1):
+            previous = [values[name] for name in names]
+            for name in names:
+                values[name] = equations[name](values)
+            change = np.max(np.abs(np.subtract([values[name] for name in names], previous)))
+            # Stop on convergence, or on a diverged block that will not come back
+            if change < tol or not np.isfinite(change):
+                break
+        sweeps.append(sweep)
+
+    return values, sweeps
@@ -0,0 +1,207 @@
+import ast
+import numpy as np
+
+##################
+# Declarative model specification
+# A model is a list of (variable, expression) equations plus the names of
+# its parameters and exogenous variables. compile() turns it into one
+# specialized step function, written out as Python source, with every
+# subexpression that does not involve an endogenous variable (K**a,
+# 1/(1+discount_rate+money_pref), ...) hoisted out of the step.
+##################
+
+def _where(condition, x, y):
+    # np.where, with a fast path for the scalar conditions of single-scenario steps
+    if isinstance(condition, (bool, np.bool_)):
+        return x if condition else y
+    return np.where(condition, x, y)
+
+# Functions available to expressions; they work on scalars and arrays
+FUNCTIONS = {
+    "log": np.log,
+    "exp": np.exp,
+    "sqrt": np.sqrt,
+    "where": _where,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+}
+
+
+class _Hoister(ast.NodeTransformer):
+    '''
+    Replaces maximal subexpressions that read no endogenous variable with
+    names of precomputed constants (_k0, _k1, ...)
+    '''
+    def __init__(self, endogenous):
+        self.endogenous = endogenous
+        self.constants = {}
+
+    def is_constant(self, node):
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and child.id in self.endogenous:
+                return False
+            if isinstance(child, ast.Call):
+                # Only hoist calls of known pure functions
+                if not (isinstance(child.func, ast.Name) and child.func.id in FUNCTIONS):
+                    return False
+        return True
+
+    def generic_visit(self, node):
+        if (isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Call, ast.Compare, ast.BoolOp))
+                and self.is_constant(node)):
+            source = ast.unparse(node)
+            if source not in self.constants:
+                self.constants[source] = "_k" + str(len(self.constants))
+            return ast.Name(id=self.constants[source], ctx=ast.Load())
+        return super().generic_visit(node)
+
+
+class _ValueLookup(ast.NodeTransformer):
+    '''
+    Rewrites endogenous variables X as _v["X"], reads from a values dict
+    '''
+    def __init__(self, endogenous):
+        self.endogenous = endogenous
+
+    def visit_Name(self, node):
+        if node.id in self.endogenous:
+            return ast.Subscript(value=ast.Name(id="_v", ctx=ast.Load()),
+                                 slice=ast.Constant(value=node.id), ctx=ast.Load())
+        return node
+
+
+class ModelSpec:
+    '''
+    A model as equations, parameters and exogenous variables
+    name: Model name
+    equations: Sequence of (variable, expression) pairs, in evaluation order
+    parameters: Names of the fixed parameters
+    exogenous: Names of the exogenous variables
+    simultaneous: If False (default) equations are evaluated in order, each
+                  seeing the variables already updated this step, as in the
+                  iterate_economy functions; if True every equation reads
+                  the values of the previous step (as in the Samuelson model)
+    '''
+    def __init__(self, name, equations, parameters, exogenous=(), simultaneous=False):
+        self.name = name
+        self.equations = list(equations)
+        self.parameters = tuple(parameters)
+        self.exogenous = tuple(exogenous)
+        self.simultaneous = simultaneous
+
+        # Endogenous variables in the order they are first assigned
+        self.variables = tuple(dict.fromkeys(var for var, _ in self.equations))
+
+        inputs = set(self.parameters) | set(self.exogenous)
+        known = inputs | set(self.variables) | set(FUNCTIONS)
+        for var, expression in self.equations:
+            if var in inputs:
+                raise ValueError(var + " is both endogenous and a parameter/exogenous variable")
+            names = {node.id for node in ast.walk(ast.parse(expression, mode="eval"))
+                     if isinstance(node, ast.Name)}
+            unknown = names - known
+            if unknown:
+                raise ValueError("unknown names in equation for " + var + ": " +
+                                 ", ".join(sorted(unknown)))
+
+        self._source = None
+        self._factory = None
+        self._equations_factory = None
+        self._jacobians = {}
+
+    def source(self):
+        '''
+        Python source of the generated step function factory
+        '''
+        if self._source is None:
+            hoister = _Hoister(set(self.variables))
+            bodies = []
+            for var, expression in self.equations:
+                tree = hoister.visit(ast.parse(expression, mode="eval"))
+                bodies.append((var, ast.unparse(tree)))
+
+            inputs = self.parameters + self.exogenous
+            args = ", ".join(self.variables)
+            lines = ["def make_step(" + ", ".join(inputs) + "):"]
+            for constant, name in hoister.constants.items():
+                lines.append("    " + name + " = " + constant)
+            lines.append("    def step(" + args + "):")
+            if self.simultaneous:
+                for var, body in bodies:
+                    lines.append("        _new_" + var + " = " + body)
+                lines.append("        return (" + ", ".join("_new_" + v for v in self.variables) + ",)")
+            else:
+                for var, body in bodies:
+                    lines.append("        " + var + " = " + body)
+                lines.append("        return (" + args + ",)")
+            lines.append("    return step")
+            self._source = "\n".join(lines) + "\n"
+
+        return self._source
+
+    def compile(self):
+        '''
+        Compile the model. Returns a factory that takes the parameters and
+        exogenous variables as keyword arguments and returns the step
+        function: step(*state) -> new state, ordered as self.variables.
+        Call the factory again whenever a parameter changes.
+        '''
+        if self._factory is None:
+            namespace = dict(FUNCTIONS)
+            exec(compile(self.source(), "<model " + self.name + ">", "exec"), namespace)
+            self._factory = namespace["make_step"]
+
+        return self._factory
+
+    def _inputs(self, inputs):
+        # The parameters and exogenous variables, and nothing else
+        missing = set(self.parameters + self.exogenous) - set(inputs)
+        if missing:
+            raise ValueError("missing inputs for " + self.name + ": " + ", ".join(sorted(missing)))
+        return {name: inputs[name] for name in self.parameters + self.exogenous}
+
+    def bind(self, **inputs):
+        '''
+        Step function for the given parameters and exogenous variables
+        '''
+        return self.compile()(**self._inputs(inputs))
+
+    def equation_functions(self, **inputs):
+        '''
+        The equations for the given parameters and exogenous variables, as a
+        dict of variable name -> function of a dict of current values (the
+        form solve_block_recursive in modelGraph.py evaluates)
+        '''
+        if self._equations_factory is None:
+            lookup = _ValueLookup(set(self.variables))
+            lines = ["def make_equations(" + ", ".join(self.parameters + self.exogenous) + "):",
+                     "    return {"]
+            for var, expression in self.equations:
+                body = ast.unparse(lookup.visit(ast.parse(expression, mode="eval")))
+                lines.append("        " + repr(var) + ": lambda _v: " + body + ",")
+            lines.append("    }")
+            namespace = dict(FUNCTIONS)
+            exec(compile("\n".join(lines) + "\n", "<equations " + self.name + ">", "exec"), namespace)
+            self._equations_factory = namespace["make_equations"]
+
+        return self._equations_factory(**self._inputs(inputs))
+
+    def auxiliary_jacobian(self, exogenous=False):
+        '''
+        Auxiliary Jacobian read off the equations (M_mat[i, j] = 1 when the
+        equation for variable i reads variable j), computed once per model.
+        Rows and columns follow self.variables, followed by self.exogenous
+        (with empty rows) when exogenous is True. Parameters are left out.
+        '''
+        if exogenous not in self._jacobians:
+            names = self.variables + (self.exogenous if exogenous else ())
+            index = {name: j for j, name in enumerate(names)}
+            M_mat = np.zeros((len(names), len(names)), dtype=int)
+            for var, expression in self.equations:
+                for node in ast.walk(ast.parse(expression, mode="eval")):
+                    if isinstance(node, ast.Name) and node.id in index:
+                        M_mat[index[var], index[node.id]] = 1
+            M_mat.flags.writeable = False
+            self._jacobians[exogenous] = M_mat
+
+        return self._jacobians[exogenous]
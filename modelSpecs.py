@@ -0,0 +1,95 @@
+from modelSpec import ModelSpec
+
+##################
+# The models of this project as ModelSpecs
+# The Samuelson and Lewis specs match the hand-written iterate_economy of
+# the same model; the neoclassical solvers' iterate_economy, block equations
+# and Newton residuals are generated from their specs.
+##################
+
+# Samuelson (1939), basicModelsPygame.py / samuelsonSolver.py
+SAMUELSON = ModelSpec(
+    "Samuelson",
+    [
+        ("C", "c1 * (C + I + G0)"),
+        ("I", "beta * (c1 * (C + I + G0) - C)"),
+    ],
+    parameters=("c1", "beta"),
+    exogenous=("G0",),
+    simultaneous=True,
+)
+
+# Lewis dual economy, lewisModelPygame.py / lewisModel.py
+LEWIS = ModelSpec(
+    "Lewis",
+    [
+        # Output sector 1 and wages sector 2
+        ("Y1", "where(L1 < lambda_val, L1 ** alpha, lambda_val ** alpha)"),
+        ("w2", "where(L1 < lambda_val, gamma * L2, w1 + rho)"),
+        # Output sector 2
+        ("Y2", "(L2 ** beta) * (K ** (1 - beta))"),
+        # Capital accumulation sector 2
+        ("K", "K + P2"),
+        # Profits sector 2
+        ("P2", "Y2 - w2 * L2"),
+        # Employment sector 2
+        ("L2", "(beta * Y2) / w2"),
+        # Employment sector 1
+        ("L1", "L - L2"),
+    ],
+    parameters=("alpha", "rho", "L", "gamma", "lambda_val", "beta"),
+    exogenous=("w1",),
+)
+
+# Neoclassical macro model, neoClassicalMacro.py / neoclassicalSolver.py
+NEOCLASSICAL = ModelSpec(
+    "Neoclassical",
+    [
+        # (1) Cobb-Douglas production function
+        ("Y", "A * (K**a) * N**(1-a)"),
+        # (2) Labour demand
+        ("w", "A * (1-a) * (K**a) * N**(-a)"),
+        # (3) Labour supply
+        ("N", "1 - (leisure) / w"),
+        # (4) Consumption demand
+        ("C", "(1 / (1 + discount_rate + money_pref)) * (Y - G0 + (Yf - Gf) / (1 + r) - leisure * (discount_rate + money_pref) * log(leisure / w))"),
+        # (5) Investment demand, solved for r
+        ("r", "(I**(a-1)) * a * A * N**(1-a)"),
+        # (6) Goods market equilibrium condition, solved for I
+        ("I", "Y - C - G0"),
+        # (7) Nominal interest rate
+        ("rn", "r + pe"),
+        # (8) Price level
+        ("P", "(M0 * rn) / ((1 + rn) * money_pref * C)"),
+    ],
+    parameters=("a", "K", "discount_rate", "money_pref", "Gf", "pe"),
+    exogenous=("A", "leisure", "G0", "Yf", "M0"),
+)
+
+# Neoclassical synthesis (IS-LM-AS-AD), neoclassicalSynthesis*.py /
+# neoclassicalSynthesisSolver.py
+NEOCLASSICAL_SYNTHESIS = ModelSpec(
+    "Neoclassical synthesis",
+    [
+        # Goods market equilibrium
+        ("Y", "C + I + G0"),
+        # Consumption demand
+        ("C", "c0 + c1 * (Y - T0)"),
+        # Investment demand
+        ("I", "i0 - i1 * r"),
+        # Money market, solved for interest rate
+        ("r", "(m0 - (M0 / P)) / m2 + m1 * Y / m2"),
+        # Unemployment rate
+        ("U", "1 - N / Nf"),
+        # Real wage
+        ("w", "A * (1 - a) * (K ** a) * (N ** (-a))"),
+        # Nominal wage
+        ("W", "(P0 * b * C) / (1 - (N / Nf))"),
+        # Price level
+        ("P", "W / w"),
+        # Employment
+        ("N", "(Y / (A * (K ** a))) ** (1 / (1 - a))"),
+    ],
+    parameters=("c0", "c1", "i1", "m1", "m2", "Nf", "K", "a", "b", "T0", "m0"),
+    exogenous=("A", "i0", "M0", "G0", "P0"),
+)
@@ -1,4 +1,5 @@
 import numpy as np
+from neoclassicalSolver import solve_equilibrium_blocks, solve_equilibrium_newton
 
 # Set the number of scenarios (including baseline)
 S = 6
@@ -43,54 +44,19 @@ pe = 0.02  # Expected rate of inflation
 Gf = 1  # Future government spending
 
 # Initialize endogenous variables at arbitrary positive values
-w = C = I = Y = r = N = P = 1 
-
-def iterate_economy(i, A, a, K, N, I, leisure, discount_rate, money_pref, G0, Yf, Gf, r):
-        '''
-        i: Simulation index
-        A: Productivity shifter
-        a: Capital elasticity of output
-        K: Exogenous capital stock
-        N: Labour supply
-        I: Investment
-        leisure: Household preference for leisure
-        discount_rate: ??????????????
-        money_pref: Household preference for money ????????????
-        G0: Government expenditures
-        Yf: Expected future income
-        Gf: Future government spending
-        r: Real interest rate ?
-        '''
-        # (1) Cobb-Douglas production function
-        Y = A[i] * (K**a) * N**(1-a)
-
-        # (2) Labour demand
-        w = A[i] * (1-a) * (K**a) * N**(-a)
-
-        # (3) Labour supply
-        N = 1 - (leisure[i]) / w
-
-        # (4) Consumption demand
-        C = (1 / (1 + discount_rate + money_pref)) * (Y - G0[i] + (Yf[i] - Gf) / (1 + r) - leisure[i] * (discount_rate + money_pref) * np.log(leisure[i] / w))
-
-        # (5) Investment demand, solved for r
-        r = (I**(a-1)) * a * A[i] * N**(1-a)
-
-        # (6) Goods market equilibrium condition, solved for I
-        I = Y - C - G0[i]
-
-        # (7) Nominal interest rate
-        rn = r + pe
-
-        # (8) Price level
-        P = (M0[i] * rn) / ((1 + rn) * money_pref * C)
-
-        return Y, w, N, C, r, I, rn, P
-
-# Solve this system numerically through 1000 iterations based on the initialization
+w = C = I = Y = r = rn = N = P = 1
+
+# Solve this system numerically block by block in the order of its dependency
+# graph (see the graph below): the simultaneous blocks (N, w) and (C, r, I) are
+# iterated until successive sweeps change by less than tol (at most 1000
+# sweeps each) based on the initialization, then Y, rn and P are evaluated once
+tol = 1e-10
 for i in range(S):
-    for iterations in range(1000):
-        Y, w, N, C, r, I, rn, P = iterate_economy(i, A, a, K, N, I, leisure, discount_rate, money_pref, G0, Yf, Gf, r)
+    result = solve_equilibrium_blocks(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe,
+                                      tol=tol, max_iter=1000, initial=(Y, w, N, C, r, I, rn, P))
+    Y, w, N, C, r, I, rn, P = result.state()
+    print("Scenario " + str(i + 1) + ": " + str(result.iterations) + " block sweeps, residual " +
+          str(result.residual))
 
     # Save results for different parameterizations in the arrays
     Y_star[i] = Y
@@ -102,9 +68,15 @@ for i in range(S):
     P_star[i] = P
     rn_star[i] = rn
 
-    # Print some results after the 1000 simulation
+    # Print some results after the simulation
     print(Y)
 
+# Solve all scenarios at once with the batched Newton solver and compare
+newton = solve_equilibrium_newton(A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe,
+                                  tol=tol)
+print("Newton: " + str(newton.iterations) + " steps, max difference in Y " +
+      str(np.max(np.abs(newton.Y - Y_star))))
+
 # Plot results (here for output only)
 # See code examples in R for plotting other results: https://macrosimulation.org/a_neoclassical_macro_model
 import matplotlib.pyplot as plt
@@ -127,25 +99,15 @@ plt.show()
 
 
 import networkx as nx
+from modelGraph import block_ordering
+from modelSpecs import NEOCLASSICAL
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Construct the auxiliary Jacobian matrix
-M_mat = np.array([
-    [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-    [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-    [0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [1, 1, 0, 0, 0, 1, 0, 0, 0, 1, 0, 1, 0],
-    [0, 0, 1, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0],
-    [1, 0, 0, 1, 1, 0, 0, 0, 0, 1, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 1],
-    [0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 1, 0, 0, 1, 1, 0, 0, 0, 0, 0]
-])
+# Construct the auxiliary Jacobian matrix from the equations of the model,
+# over the endogenous variables followed by the exogenous ones
+M_mat = NEOCLASSICAL.auxiliary_jacobian(exogenous=True)
+variable_names = NEOCLASSICAL.variables + NEOCLASSICAL.exogenous
 
 # Create adjacency matrix from transpose of auxiliary Jacobian and add column names
 A_mat = M_mat.transpose()
@@ -154,21 +116,14 @@ A_mat = M_mat.transpose()
 G = nx.DiGraph(A_mat)
 
 # Define node labels
-nodelabs = {
-    0: "Y",
-    1: "w",
-    2: "N",
-    3: "C",
-    4: "I",
-    5: "r",
-    6: "P",
-    7: r"$r_n$",
-    8: r"$M_0$",
-    9: r"$G_0$",
-    10: "A",
-    11: r"$Y^f$",
-    12: r"$M_d$"
-}
+latex_labels = {"rn": r"$r_n$", "M0": r"$M_0$", "G0": r"$G_0$", "Yf": r"$Y^f$", "leisure": r"$b_1$"}
+nodelabs = {j: latex_labels.get(name, name) for j, name in enumerate(variable_names)}
+
+# Block-triangular ordering of the equations: only the simultaneous blocks
+# need to be solved iteratively, the others are evaluated once in order
+for members, simultaneous in block_ordering(M_mat):
+    kind = "simultaneous" if simultaneous else "recursive" if M_mat[members].any() else "exogenous"
+    print(kind + ": " + ", ".join(nodelabs[j] for j in members))
 
 # Plot the directed graph
 pos = nx.spring_layout(G, seed=42)  
@@ -1,9 +1,23 @@
+import sys
+
 import pygame
 import numpy as np
 
+from neoclassicalSolver import iterate_economy
+from ringBuffer import RingBuffer
+from pygameText import TextCache, TextField
+from renderScheduler import RenderScheduler
+from pygameCharts import PygameLineChart, export_charts
+from headless import HeadlessRun
+from frameProfiler import FrameProfiler
+
 ##################
 # pygame setup
 ##################
+# --headless runs a scripted batch without a window (see headless.py)
+headless = HeadlessRun.from_args(scenario_key="q")
+get_events = pygame.event.get if headless is None else headless.events
+
 pygame.init()
 screen = pygame.display.set_mode((1720, 980))
 clock = pygame.time.Clock()
@@ -12,19 +26,18 @@ dt = 0
 
 # Fonts
 my_font = pygame.font.SysFont('Comic Sans MS', 30)
-##################
 
-
-##################
-# Matplotlib setup
-# Within pygame, see article here:
-# https://stackoverflow.com/questions/48093361/using-matplotlib-in-pygame
-##################
-import matplotlib
-matplotlib.use("Agg")
-
-import matplotlib.backends.backend_agg as agg
-import matplotlib.pyplot as plt
+# Only changed regions of the screen are redrawn
+scheduler = RenderScheduler(screen, "purple")
+
+# Time spent in each stage of a frame; o shows the rolling p50/p95/max,
+# and a summary is saved to PROFILE_FILE on exit if the overlay was shown
+# or the script was started with --profile
+profiler = FrameProfiler(("events", "economy", "text", "charts", "display", "overlay", "tick"))
+profiler_font = pygame.font.SysFont('Courier New', 16)
+show_profiler = False
+save_profile = "--profile" in sys.argv[1:]
+PROFILE_FILE = "neoclassicalModel_profile.json"
 ##################
 
 
@@ -79,53 +92,24 @@ Gf = 1  # Future government spending
 w = C = I = Y = r = N = P = 1 
 ##################
 
+# Maximum number of iterations to display in each graph
+MAX_PLOT_LENGTH = 100
+
 ##################
 # Show graph of the economy
 # https://macrosimulation.org/a_neoclassical_macro_model#directed-graph
 ##################
 
-def iterate_economy(i, A, a, K, N, I, leisure, discount_rate, money_pref, G0, Yf, Gf, r, M0):
-        '''
-        i: Simulation index
-        A: Productivity shifter
-        a: Capital elasticity of output
-        K: Exogenous capital stock
-        N: Labour supply
-        I: Investment
-        leisure: Household preference for leisure
-        discount_rate: ??????????????
-        money_pref: Household preference for money ????????????
-        G0: Government expenditures
-        Yf: Expected future income
-        Gf: Future government spending
-        r: Real interest rate ?
-        M0: Money supply
-        '''
-        # (1) Cobb-Douglas production function
-        Y = A[i] * (K**a) * N**(1-a)
-
-        # (2) Labour demand
-        w = A[i] * (1-a) * (K**a) * N**(-a)
-
-        # (3) Labour supply
-        N = 1 - (leisure[i]) / w
-
-        # (4) Consumption demand
-        C = (1 / (1 + discount_rate + money_pref)) * (Y - G0[i] + (Yf[i] - Gf) / (1 + r) - leisure[i] * (discount_rate + money_pref) * np.log(leisure[i] / w))
-
-        # (5) Investment demand, solved for r
-        r = (I**(a-1)) * a * A[i] * N**(1-a)
-
-        # (6) Goods market equilibrium condition, solved for I
-        I = Y - C - G0[i]
-
-        # (7) Nominal interest rate
-        rn = r + pe
-
-        # (8) Price level
-        P = (M0[i] * rn) / ((1 + rn) * money_pref * C)
-
-        return Y, w, N, C, r, I, rn, P
+# Text surfaces: static labels are rendered once, the numeric fields only
+# when their displayed value changes
+text_cache = TextCache()
+iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, (255, 255, 255))
+Y_text = TextField(text_cache, my_font, 'Y: ', (255, 255, 255))
+leisure_text = TextField(text_cache, my_font, 'leisure prefrence: ', (255, 255, 255))
+A_text = TextField(text_cache, my_font, 'Productivity shifter: ', (255, 255, 255))
+G0_text = TextField(text_cache, my_font, 'Government expenditure: ', (255, 255, 255))
+M0_text = TextField(text_cache, my_font, 'Money supply: ', (255, 255, 255))
+iter_text = TextField(text_cache, my_font, 'Iteration number: ', (255, 255, 255))
 
 for sim_no in range(S):
 
@@ -133,30 +117,44 @@ for sim_no in range(S):
     if not running:
         break
 
+    # New scenario: redraw the whole screen once
+    scheduler.invalidate()
+
     # Count number of iterations for this simulation
     iteration_count = 0
     is_iter = False
     in_sim = True
 
-    # Used for plotting the simulation over time
-    Y_time = []
-    P_time = []
-    N_time = []
-    C_time = []
-    I_time = []
+    # Used for plotting the simulation over time; only the periods on screen are kept
+    history = RingBuffer(("Y", "P", "N", "C", "I"), MAX_PLOT_LENGTH + 1)
 
     # Append initial value
-    Y_time.append(Y)
-    P_time.append(P)
-    N_time.append(N)
-    C_time.append(C)
-    I_time.append(I)
+    history.append(Y, P, N, C, I)
+    if headless is not None:
+        headless.record(sim_no, iteration_count, Y=Y, w=w, N=N, C=C, r=r, I=I, P=P, leisure=leisure[sim_no],
+                        A=A[sim_no], G0=G0[sim_no], M0=M0[sim_no], Yf=Yf[sim_no])
+
+    # Charts of this scenario, created once and updated every frame; p saves them as PNG
+    output_chart = PygameLineChart(scenario_names[sim_no] + ": Output", "Y", size=(500, 400), fontsize=10)
+    consumption_chart = PygameLineChart(scenario_names[sim_no] + ": Consumption", "Consumption", size=(500, 400),
+                                        fontsize=10)
+    investment_chart = PygameLineChart(scenario_names[sim_no] + ": Investment", "Investment", fontsize=10)
+    price_chart = PygameLineChart(scenario_names[sim_no] + ": Price", "Price", fontsize=10)
+    employment_chart = PygameLineChart(scenario_names[sim_no] + ": Employment", "Employment", fontsize=10)
+    charts = {"output": output_chart,
+              "consumption": consumption_chart,
+              "investment": investment_chart,
+              "price": price_chart,
+              "employment": employment_chart}
+    charts_changed = False
 
     while in_sim and running:
 
         # poll for events
         # pygame.QUIT event means the user clicked X to close your window
-        for event in pygame.event.get():
+        with profiler.stage("events"):
+            events = get_events()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.KEYDOWN:
@@ -191,170 +189,114 @@ for sim_no in range(S):
                 if event.key == pygame.K_g:
                     print("g pressed!")
                     M0[sim_no] -= 0.1
+                if event.key == pygame.K_p:
+                    print("p pressed!")
+                    export_charts(charts, "neoclassicalModel" + str(sim_no + 1) + "_")
+                if event.key == pygame.K_o:
+                    print("o pressed!")
+                    show_profiler = not show_profiler
+                    save_profile = save_profile or show_profiler
+                    if not show_profiler:
+                        scheduler.hide("profiler")
             
             # Player has triggered an iteration
             if is_iter:
-                # Run economy updates
-                Y, w, N, C, r, I, rn, P = iterate_economy(sim_no, A, a, K, N, I, leisure, discount_rate, money_pref, G0, Yf, Gf, r, M0)
-                # Save results for different parameterizations in the arrays
-                Y_star[sim_no] = Y
-                w_star[sim_no] = w
-                C_star[sim_no] = C
-                I_star[sim_no] = I
-                r_star[sim_no] = r
-                N_star[sim_no] = N
-                P_star[sim_no] = P
-                rn_star[sim_no] = rn
-
-                C_time.append(C)
-                P_time.append(P)
-                N_time.append(N)
-                I_time.append(I)
-                Y_time.append(Y)
+                # Run economy updates (timed for the profiler overlay)
+                with profiler.stage("economy"):
+                    Y, w, N, C, r, I, rn, P = iterate_economy(sim_no, A, a, K, N, I, leisure, discount_rate, money_pref, G0, Yf, Gf, r, M0, pe)
+                    # Save results for different parameterizations in the arrays
+                    Y_star[sim_no] = Y
+                    w_star[sim_no] = w
+                    C_star[sim_no] = C
+                    I_star[sim_no] = I
+                    r_star[sim_no] = r
+                    N_star[sim_no] = N
+                    P_star[sim_no] = P
+                    rn_star[sim_no] = rn
+
+                history.append(Y, P, N, C, I)
                 iteration_count += 1
+                if headless is not None:
+                    headless.record(sim_no, iteration_count, Y=Y, w=w, N=N, C=C, r=r, I=I, P=P, leisure=leisure[sim_no],
+                                    A=A[sim_no], G0=G0[sim_no], M0=M0[sim_no], Yf=Yf[sim_no])
+                charts_changed = True
                 # Wait for next iteration from player
                 is_iter = False
 
-            # fill the screen with a color to wipe away anything from last frame
-            screen.fill("purple")
-
             #########################
             # Update economic visuals
             #########################
 
             # Add simple text
-            iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, (255, 255, 255))
-            sim_text_surface = my_font.render(scenario_names[sim_no], True, (255, 255, 255))
-            Y_text_surface = my_font.render('Y: ' + str(Y_star[sim_no]), True, (255, 255, 255))
-            leisure_text_surface = my_font.render('leisure prefrence: ' + str(leisure[sim_no]), True, (255, 255, 255))
-            A_text_surface = my_font.render('Productivity shifter: ' + str(A[sim_no]), True, (255, 255, 255))
-            G0_text_surface = my_font.render('Government expenditure: ' + str(G0[sim_no]), True, (255, 255, 255))
-            M0_text_surface = my_font.render('Money supply: ' + str(M0[sim_no]), True, (255, 255, 255))
-            iter_text_surface = my_font.render('Iteration number: ' + str(iteration_count), True, (255, 255, 255))
-
-            # Render text on the page at the specified positions
-            screen.blit(iterate_text_surface, (50, 10)) 
-            screen.blit(sim_text_surface, (50, 100)) 
-            screen.blit(Y_text_surface, (50, 150))
-            screen.blit(leisure_text_surface, (50, 200))
-            screen.blit(A_text_surface, (50, 250))
-            screen.blit(G0_text_surface, (50, 300)) 
-            screen.blit(M0_text_surface, (50, 350)) 
-            screen.blit(iter_text_surface, (50, 600)) 
-
-            if (iteration_count > 0):
-
-                ## TODO need to fix these ugly plots!!!!!!!!
-                # Plot output
-                plt.plot(Y_time[0:iteration_count], color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Y")
-                plt_title = scenario_names[sim_no] + ": Output"
-                plt.title(plt_title, fontsize=10)
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                surf = pygame.image.fromstring(raw_data, size, "RGB")
-                screen.blit(surf, (1200,0))
-
-                # Plot consumption
-                plt.plot(C_time[0:iteration_count], color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Consumption")
-                plt_title = scenario_names[sim_no] + ": Consumption"
-                plt.title(plt_title, fontsize=10)
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                surf = pygame.image.fromstring(raw_data, (size), "RGB")
-                screen.blit(surf, (1200,400))
-
-                # Plot investment
-                plt.plot(I_time[0:iteration_count], color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Investment")
-                plt_title = scenario_names[sim_no] + ": Investment"
-                plt.title(plt_title, fontsize=10)
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                surf = pygame.image.fromstring(raw_data, size, "RGB")
-                surf = pygame.transform.scale(surf, (400, 360))
-                screen.blit(surf, (800,0))
-
-                # Plot price level
-                plt.plot(P_time[0:iteration_count], color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Price")
-                plt_title = scenario_names[sim_no] + ": Price"
-                plt.title(plt_title, fontsize=10)
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                surf = pygame.image.fromstring(raw_data, size, "RGB")
-                surf = pygame.transform.scale(surf, (400, 360))
-                screen.blit(surf, (800,360))
-
-                # Plot employment level
-                plt.plot(N_time[0:iteration_count], color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Employment")
-                plt_title = scenario_names[sim_no] + ": Employment"
-                plt.title(plt_title, fontsize=10)
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                surf = pygame.image.fromstring(raw_data, size, "RGB")
-                surf = pygame.transform.scale(surf, (400, 360))
-                screen.blit(surf, (400,350))
+            with profiler.stage("text"):
+                sim_text_surface = text_cache.render(my_font, scenario_names[sim_no], (255, 255, 255))
+                Y_text_surface = Y_text.render(Y_star[sim_no])
+                leisure_text_surface = leisure_text.render(leisure[sim_no])
+                A_text_surface = A_text.render(A[sim_no])
+                G0_text_surface = G0_text.render(G0[sim_no])
+                M0_text_surface = M0_text.render(M0[sim_no])
+                iter_text_surface = iter_text.render(iteration_count)
+
+                # Render text on the page at the specified positions
+                scheduler.show("iterate_text", iterate_text_surface, (50, 10))
+                scheduler.show("sim_text", sim_text_surface, (50, 100))
+                scheduler.show("Y_text", Y_text_surface, (50, 150))
+                scheduler.show("leisure_text", leisure_text_surface, (50, 200))
+                scheduler.show("A_text", A_text_surface, (50, 250))
+                scheduler.show("G0_text", G0_text_surface, (50, 300))
+                scheduler.show("M0_text", M0_text_surface, (50, 350))
+                scheduler.show("iter_text", iter_text_surface, (50, 600))
+
+            with profiler.stage("charts"):
+                if (iteration_count > 0) and charts_changed:
+
+                    plot_min = max(0, iteration_count - MAX_PLOT_LENGTH)
+                    plot_max = iteration_count
+
+                    # Plot output
+                    output_chart.show(history.window("Y"), plot_min, plot_max)
+                    scheduler.show("output_chart", output_chart.render(), (1200,0), changed=True)
+
+                    # Plot consumption
+                    consumption_chart.show(history.window("C"), plot_min, plot_max)
+                    scheduler.show("consumption_chart", consumption_chart.render(), (1200,400), changed=True)
+
+                    # Plot investment
+                    investment_chart.show(history.window("I"), plot_min, plot_max)
+                    scheduler.show("investment_chart", investment_chart.render(), (800,0), changed=True)
+
+                    # Plot price level
+                    price_chart.show(history.window("P"), plot_min, plot_max)
+                    scheduler.show("price_chart", price_chart.render(), (800,360), changed=True)
+
+                    # Plot employment level
+                    employment_chart.show(history.window("N"), plot_min, plot_max)
+                    scheduler.show("employment_chart", employment_chart.render(), (400,350), changed=True)
+                    charts_changed = False
             ##########################
 
-            # flip() the display to put your work on screen
-            pygame.display.flip()
+            # Push only the changed regions to the display; frames in which nothing
+            # changed are skipped
+            with profiler.stage("display"):
+                scheduler.update()
+            if headless is not None:
+                headless.save_frame(screen)
+
+        # Frame timings, refreshed a few times a second
+        if show_profiler:
+            with profiler.stage("overlay"):
+                scheduler.show("profiler", profiler.overlay(profiler_font, (255, 255, 255), (0, 0, 0)), (50, 730))
+                scheduler.update()
 
         # limits FPS to 60
         # dt is delta time in seconds since last frame, used for framerate-
         # independent physics.
-        dt = clock.tick(60) / 1000
-
+        with profiler.stage("tick"):
+            dt = clock.tick(60 if headless is None else 0) / 1000
+        profiler.end_frame()
+
+if headless is not None:
+    headless.finish()
+if save_profile:
+    profiler.save(PROFILE_FILE)
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,286 @@
+import numpy as np
+
+from modelGraph import named_blocks, solve_block_recursive
+from modelSpecs import NEOCLASSICAL
+
+##################
+# Neoclassical macro model solvers
+# https://macrosimulation.org/a_neoclassical_macro_model
+##################
+
+# Order of the endogenous variables in the state vector, as in the model
+# specification, so that M_MAT rows and columns line up with it
+VARIABLES = NEOCLASSICAL.variables
+
+def make_step(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe):
+    '''
+    Step function of scenario i, generated from modelSpecs.NEOCLASSICAL (the
+    only place the equations are written out): step(*state) -> new state,
+    ordered as VARIABLES. Bind once and call it in loops.
+    Arguments as in iterate_economy.
+    '''
+    return NEOCLASSICAL.bind(A=A[i], a=a, K=K, leisure=leisure[i], discount_rate=discount_rate,
+                             money_pref=money_pref, G0=G0[i], Yf=Yf[i], Gf=Gf, M0=M0[i], pe=pe)
+
+
+def iterate_economy(i, A, a, K, N, I, leisure, discount_rate, money_pref, G0, Yf, Gf, r, M0, pe):
+    '''
+    One step of the equations of modelSpecs.NEOCLASSICAL for scenario i
+    (binds the step function on every call, see make_step)
+    i: Simulation index
+    A: Productivity shifter
+    a: Capital elasticity of output
+    K: Exogenous capital stock
+    N: Labour supply
+    I: Investment
+    leisure: Household preference for leisure
+    discount_rate: Discount rate
+    money_pref: Household preference for money
+    G0: Government expenditures
+    Yf: Expected future income
+    Gf: Future government spending
+    r: Real interest rate
+    M0: Money supply
+    pe: Expected rate of inflation
+    '''
+    step = make_step(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe)
+    # Equations (1)-(8) in order; only N, r and I are read before they are
+    # recomputed, the other states are not needed
+    return step(None, None, N, None, r, I, None, None)
+
+
+class EquilibriumResult:
+    '''
+    Outcome of an equilibrium solve
+    Y, w, N, C, r, I, rn, P: Values of the endogenous variables
+    iterations: Number of model steps used
+    residual: Max absolute change of (Y, w, N, C, r, I, rn, P) in the last iteration,
+              or max absolute equation residual for the Newton solver
+    converged: Whether residual fell below the tolerance within the iteration cap
+    (the Newton solver returns length S arrays for everything but iterations)
+    '''
+    def __init__(self, state, iterations, residual, converged):
+        self.Y, self.w, self.N, self.C, self.r, self.I, self.rn, self.P = state
+        self.iterations = iterations
+        self.residual = residual
+        self.converged = converged
+
+    def state(self):
+        return self.Y, self.w, self.N, self.C, self.r, self.I, self.rn, self.P
+
+    def __repr__(self):
+        return ("EquilibriumResult(Y=" + str(self.Y) + ", iterations=" + str(self.iterations) +
+                ", residual=" + str(self.residual) + ", converged=" + str(self.converged) + ")")
+
+
+def residual_norm(state, previous):
+    '''
+    Max absolute change between two (Y, w, N, C, r, I, rn, P) states
+    '''
+    return np.max(np.abs(np.subtract(state, previous)))
+
+
+def solve_equilibrium(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe,
+                      tol=1e-10, max_iter=1000, initial=(1, 1, 1, 1, 1, 1, 1, 1)):
+    '''
+    Iterate the economy until the residual norm drops below tol, or until
+    max_iter iterations have been used.
+    i: Simulation index
+    tol: Tolerance on the residual norm
+    max_iter: Iteration cap
+    initial: Starting values for (Y, w, N, C, r, I, rn, P)
+    Other arguments as in iterate_economy.
+    '''
+    step = make_step(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe)
+    state = tuple(initial)
+    residual = np.inf
+
+    for iterations in range(1, max_iter + 1):
+        previous = state
+        state = step(*state)
+
+        residual = residual_norm(state, previous)
+        if residual < tol:
+            return EquilibriumResult(state, iterations, residual, True)
+        # Stop early on a diverged solve too, it will not come back
+        if not np.isfinite(residual):
+            return EquilibriumResult(state, iterations, residual, False)
+
+    return EquilibriumResult(state, max_iter, residual, False)
+
+
+##################
+# Block-recursive solver
+# The same equations, one function per variable, solved block by block in
+# the order given by the dependency graph (see modelGraph.py). Only the
+# simultaneous blocks (N, w) and (C, r, I) are iterated; Y, rn and P are
+# evaluated once.
+##################
+
+# Auxiliary Jacobian over VARIABLES (M_MAT[i, j] = 1 when the equation for
+# variable i reads variable j), read off the model specification
+M_MAT = NEOCLASSICAL.auxiliary_jacobian()
+
+def make_equations(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe):
+    '''
+    Equations (1)-(8) as a dict of variable name -> function of the current
+    values, for scenario i, generated from the model specification (the
+    same source as M_MAT)
+    Arguments as in iterate_economy.
+    '''
+    return NEOCLASSICAL.equation_functions(A=A[i], a=a, K=K, leisure=leisure[i], discount_rate=discount_rate,
+                                           money_pref=money_pref, G0=G0[i], Yf=Yf[i], Gf=Gf, M0=M0[i], pe=pe)
+
+
+def solve_equilibrium_blocks(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe,
+                             tol=1e-10, max_iter=1000, initial=(1, 1, 1, 1, 1, 1, 1, 1)):
+    '''
+    Block-recursive solve of scenario i. Returns an EquilibriumResult whose
+    iterations is the total number of block sweeps.
+    tol: Tolerance on the max absolute change within a simultaneous block
+    max_iter: Cap on the number of sweeps of each simultaneous block
+    initial: Starting values for (Y, w, N, C, r, I, rn, P)
+    Other arguments as in iterate_economy.
+    '''
+    equations = make_equations(i, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe)
+    blocks = named_blocks(M_MAT, VARIABLES)
+    values, sweeps = solve_block_recursive(equations, blocks, dict(zip(VARIABLES, initial)),
+                                           tol=tol, max_iter=max_iter)
+
+    # Residual of the full system at the solution
+    state = tuple(values[name] for name in VARIABLES)
+    with np.errstate(all="ignore"):
+        residual = np.max(np.abs(equilibrium_residuals(np.array([state]), *(
+            p[i:i + 1] if np.ndim(p) else p
+            for p in (A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe)))))
+
+    return EquilibriumResult(state, sum(sweeps), residual, residual < tol)
+
+
+##################
+# Batched Newton solver
+# Equations (1)-(8) of the model specification written as residuals F(x) = 0 in
+# x = (Y, w, N, C, r, I, rn, P), solved for all scenarios at once with
+# the analytic Jacobian stacked into an (S, 8, 8) array.
+##################
+
+def equilibrium_residuals(x, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe):
+    '''
+    Residuals of equations (1)-(8), shape (S, 8)
+    x: Endogenous variables (Y, w, N, C, r, I, rn, P), shape (S, 8)
+    Other arguments as in iterate_economy, as scalars or length S arrays.
+    '''
+    equations = NEOCLASSICAL.equation_functions(A=A, a=a, K=K, leisure=leisure, discount_rate=discount_rate,
+                                                money_pref=money_pref, G0=G0, Yf=Yf, Gf=Gf, M0=M0, pe=pe)
+    values = dict(zip(VARIABLES, x.T))
+    F = np.empty_like(x)
+    for k, name in enumerate(VARIABLES):
+        F[:, k] = values[name] - equations[name](values)
+
+    return F
+
+
+def equilibrium_jacobian(x, A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe):
+    '''
+    Analytic Jacobian of equilibrium_residuals, shape (S, 8, 8) with
+    J[s, equation, variable]
+    '''
+    Y, w, N, C, r, I, rn, P = x.T
+    k = 1 / (1 + discount_rate + money_pref)
+    J = np.zeros(x.shape + (8,))
+    J[:, range(8), range(8)] = 1
+
+    # (1) Y = A K^a N^(1-a)
+    J[:, 0, 2] = -A * (K**a) * (1-a) * N**(-a)
+    # (2) w = A (1-a) K^a N^(-a)
+    J[:, 1, 2] = A * (1-a) * (K**a) * a * N**(-a-1)
+    # (3) N = 1 - leisure / w
+    J[:, 2, 1] = -leisure / w**2
+    # (4) Consumption demand
+    J[:, 3, 0] = -k
+    J[:, 3, 1] = -k * leisure * (discount_rate + money_pref) / w
+    J[:, 3, 4] = k * (Yf - Gf) / (1 + r)**2
+    # (5) r = a A I^(a-1) N^(1-a)
+    J[:, 4, 2] = -(I**(a-1)) * a * A * (1-a) * N**(-a)
+    J[:, 4, 5] = -(a-1) * (I**(a-2)) * a * A * N**(1-a)
+    # (6) I = Y - C - G0
+    J[:, 5, 0] = -1
+    J[:, 5, 3] = 1
+    # (7) rn = r + pe
+    J[:, 6, 4] = -1
+    # (8) P = M0 rn / ((1 + rn) money_pref C)
+    J[:, 7, 3] = (M0 * rn) / ((1 + rn) * money_pref * C**2)
+    J[:, 7, 6] = -M0 / ((1 + rn)**2 * money_pref * C)
+
+    return J
+
+
+def solve_equilibrium_newton(A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe,
+                             tol=1e-10, max_iter=50, initial=(1, 1, 1, 1, 1, 1, 1, 1)):
+    '''
+    Newton-Raphson solve of all scenarios at once, one batched linear solve
+    per step. Steps that leave the model's domain (log of a negative number,
+    negative investment) or increase the residual are halved per scenario.
+    Returns an EquilibriumResult whose variables, residual and converged
+    flags are length S arrays.
+    A, leisure, G0, Yf, M0: Scenario parameters, scalars or length S arrays
+    tol: Tolerance on the max absolute equation residual
+    max_iter: Cap on the number of Newton steps
+    initial: Starting values for (Y, w, N, C, r, I, rn, P), shape (8,) or (S, 8)
+    Other arguments as in iterate_economy.
+    '''
+    A, leisure, G0, Yf, M0 = np.broadcast_arrays(*(np.asarray(p, dtype=float)
+                                                  for p in (A, leisure, G0, Yf, M0)))
+    S = A.size
+    A, leisure, G0, Yf, M0 = (p.ravel() for p in (A, leisure, G0, Yf, M0))
+    params = (A, a, K, leisure, discount_rate, money_pref, G0, Yf, Gf, M0, pe)
+
+    def residual_norm_of(x):
+        with np.errstate(all="ignore"):
+            norm = np.max(np.abs(equilibrium_residuals(x, *params)), axis=1)
+        return np.where(np.isfinite(norm), norm, np.inf)
+
+    x = np.array(np.broadcast_to(np.asarray(initial, dtype=float), (S, 8)))
+    residual = residual_norm_of(x)
+
+    stalled = np.zeros(S, dtype=bool)
+    iterations = 0
+    while iterations < max_iter:
+        active = (residual >= tol) & ~stalled
+        if not active.any():
+            break
+        iterations += 1
+
+        xa = x[active]
+        pa = tuple(p[active] if np.ndim(p) else p for p in params)
+        with np.errstate(all="ignore"):
+            F = equilibrium_residuals(xa, *pa)
+            J = equilibrium_jacobian(xa, *pa)
+            try:
+                step = np.linalg.solve(J, F[:, :, None])[:, :, 0]
+            except np.linalg.LinAlgError:
+                # A singular Jacobian in any scenario fails the whole batch
+                step = (np.linalg.pinv(J) @ F[:, :, None])[:, :, 0]
+
+        # Backtrack per scenario until the residual goes down
+        t = np.ones(len(xa))
+        old = residual[active]
+        for halving in range(30):
+            trial = xa - t[:, None] * step
+            with np.errstate(all="ignore"):
+                new = np.max(np.abs(equilibrium_residuals(trial, *pa)), axis=1)
+            new = np.where(np.isfinite(new), new, np.inf)
+            worse = new >= old
+            if not worse.any():
+                break
+            t = np.where(worse, t / 2, t)
+
+        # Scenarios that found no better point keep their current one and
+        # are not stepped again (typically draws without a valid equilibrium)
+        stalled[active] = worse
+        x[active] = np.where(worse[:, None], xa, trial)
+        residual[active] = np.where(worse, old, new)
+
+    converged = residual < tol
+
+    return EquilibriumResult(tuple(x.T), iterations, residual, converged)
@@ -1,4 +1,5 @@
 import numpy as np
+from neoclassicalSynthesisSolver import solve_synthesis
 
 # Set the number of scenarios (including baseline)
 S = 6
@@ -14,6 +15,9 @@ P_star = np.empty(S)  # Price level
 w_star = np.empty(S)  # Real wage
 W_star = np.empty(S)  # Nominal wage
 
+scenario_names = ["1:Baseline", "2:Fall animal spirits", "3:Rise product.",
+                  "4:Rise exp. price", "5:Monetary expan.", "6:Fiscal expan."]
+
 # Set exogenous variables that will be shifted
 i0 = np.zeros(S)  # Autonomous investment (animal spirits)
 M0 = np.zeros(S)  # Money supply
@@ -58,39 +62,21 @@ T0 = 1  # Tax revenues
 m0 = 6  # Liquidity preference
 
 # Initialize endogenous variables at some arbitrary positive value
-Y = C = I = r = P = w = N = W = 1
-
-# Solve this system numerically through 1000 iterations based on the initialization
-for i in range(S):
-    for iterations in range(1000):
-        # Model equations
-
-        # Goods market equilibrium
-        Y = C + I + G0[i]
-
-        # Consumption demand
-        C = c0 + c1 * (Y - T0)
-
-        # Investment demand
-        I = i0[i] - i1 * r
+Y = C = I = r = U = P = w = N = W = 1
 
-        # Money market, solved for interest rate
-        r = (m0 - (M0[i] / P)) / m2 + m1 * Y / m2
+# Choose how to accelerate the fixed-point iteration:
+# "plain", "damped", "aitken" or "anderson"
+accelerator = "anderson"
 
-        # Unemployment rate
-        U = 1 - N / Nf
-
-        # Real wage
-        w = A[i] * (1 - a) * (K ** a) * (N ** (-a))
-
-        # Nominal wage
-        W = (P0[i] * b * C) / (1 - (N / Nf))
-
-        # Price level
-        P = W / w
-
-        # Employment
-        N = (Y / (A[i] * (K ** a))) ** (1 / (1 - a))
+# Solve this system numerically, stopping once the residual is below tol
+# (at most 1000 iterations) based on the initialization
+for i in range(S):
+    result = solve_synthesis(G0[i], c0, c1, T0, i0[i], i1, m0, M0[i], m2, m1, Nf, A[i], a, K, P0[i], b,
+                             accelerator=accelerator, tol=1e-10, max_iter=1000,
+                             initial=(Y, C, I, r, U, w, W, P, N))
+    Y, C, I, r, U, w, W, P, N = result.x
+    print(scenario_names[i] + ": " + str(result.iterations) + " iterations, residual " +
+          str(result.residual))
 
     # Save results for different parameterizations in the arrays
     Y_star[i] = Y
@@ -1,9 +1,20 @@
 import pygame
 import numpy as np
 
+from neoclassicalSynthesisSolver import iterate_economy as synthesis_step
+from ringBuffer import RingBuffer
+from pygameText import TextCache, TextField
+from renderScheduler import RenderScheduler
+from pygameCharts import PygameLineChart, export_charts
+from headless import HeadlessRun
+
 ##################
 # pygame setup
 ##################
+# --headless runs a scripted batch without a window (see headless.py)
+headless = HeadlessRun.from_args(scenario_key="q")
+get_events = pygame.event.get if headless is None else headless.events
+
 pygame.init()
 screen = pygame.display.set_mode((1720, 980))
 clock = pygame.time.Clock()
@@ -12,19 +23,9 @@ dt = 0
 
 # Fonts
 my_font = pygame.font.SysFont('Comic Sans MS', 30)
-##################
 
-
-##################
-# Matplotlib setup
-# Within pygame, see article here:
-# 
-##################
-import matplotlib
-matplotlib.use("Agg")
-
-import matplotlib.backends.backend_agg as agg
-import matplotlib.pyplot as plt
+# Only changed regions of the screen are redrawn
+scheduler = RenderScheduler(screen, "purple")
 ##################
 
 
@@ -94,6 +95,9 @@ m0 = 6  # Liquidity preference
 Y = C = I = r = P = w = N = W = 1
 ##################
 
+# Maximum number of iterations to display in each graph
+MAX_PLOT_LENGTH = 100
+
 ##################
 # Show graph of the economy
 # https://macrosimulation.org/a_neoclassical_synthesis_model_is_lm_as_ad#directed-graph
@@ -125,36 +129,21 @@ def iterate_economy(sim_no, C, I, G0, c0, c1, Y, T0, i0, i1, r, m0, M0, P, m2, m
         P0: Expected price level
         b: Household preference for leisure
         '''
-                
-        # Model equations
-        # Goods market equilibrium
-        Y = C + I + G0[sim_no]
-
-        # Consumption demand
-        C = c0 + c1 * (Y - T0)
-
-        # Investment demand
-        I = i0[sim_no] - i1 * r
-
-        # Money market, solved for interest rate
-        r = (m0 - (M0[sim_no] / P)) / m2 + m1 * Y / m2
-
-        # Unemployment rate
-        U = 1 - N / Nf
-
-        # Real wage
-        w = A[sim_no] * (1 - a) * (K ** a) * (N ** (-a))
-
-        # Nominal wage
-        W = (P0[sim_no] * b * C) / (1 - (N / Nf))
-
-        # Price level
-        P = W / w
-
-        # Employment
-        N = (Y / (A[sim_no] * (K ** a))) ** (1 / (1 - a))
-
-        return Y, C, I, r, U, w, W, P, N
+        # The equations live in the model specification, see
+        # neoclassicalSynthesisSolver.iterate_economy
+        return synthesis_step(C, I, G0[sim_no], c0, c1, Y, T0, i0[sim_no], i1, r, m0, M0[sim_no], P, m2, m1,
+                              N, Nf, A[sim_no], a, K, P0[sim_no], b)
+
+# Text surfaces: static labels are rendered once, the numeric fields only
+# when their displayed value changes
+text_cache = TextCache()
+iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, (255, 255, 255))
+Y_text = TextField(text_cache, my_font, 'Y: ', (255, 255, 255))
+i0_text = TextField(text_cache, my_font, 'Autonomous investment: ', (255, 255, 255))
+A_text = TextField(text_cache, my_font, 'Productivity shifter: ', (255, 255, 255))
+G0_text = TextField(text_cache, my_font, 'Government expenditure: ', (255, 255, 255))
+M0_text = TextField(text_cache, my_font, 'Money supply: ', (255, 255, 255))
+iter_text = TextField(text_cache, my_font, 'Iteration number: ', (255, 255, 255))
 
 for sim_no in range(S):
 
@@ -162,37 +151,49 @@ for sim_no in range(S):
     if not running:
         break
 
+    # New scenario: redraw the whole screen once
+    scheduler.invalidate()
+
     # Count number of iterations for this simulation
     iteration_count = 0
     is_iter = False
     in_sim = True
 
-    # Used for plotting the simulation over time
-    Y_time = []
-    P_time = []
-    N_time = []
-    C_time = []
-    I_time = []
+    # Used for plotting the simulation over time; only the periods on screen are kept
+    history = RingBuffer(("Y", "P", "N", "C", "I"), MAX_PLOT_LENGTH + 1)
 
     # Append initial value
-    Y_time.append(Y)
-    P_time.append(P)
-    N_time.append(N)
-    C_time.append(C)
-    I_time.append(I)
+    history.append(Y, P, N, C, I)
+    if headless is not None:
+        headless.record(sim_no, iteration_count, Y=Y, C=C, I=I, r=r, w=w, W=W, P=P, N=N, i0=i0[sim_no],
+                        A=A[sim_no], G0=G0[sim_no], M0=M0[sim_no], P0=P0[sim_no])
 
-    # graph images to render
+    # graph images to render, and whether they changed since last shown
+    charts_changed = False
     employment_surf = None
     price_surf = None
     output_surf = None
     consumption_surf = None
     investment_surf = None
 
+    # Charts of this scenario, created once and updated every step; p saves them as PNG
+    output_chart = PygameLineChart(scenario_names[sim_no] + ": Output", "Y", size=(500, 400), fontsize=10)
+    consumption_chart = PygameLineChart(scenario_names[sim_no] + ": Consumption", "Consumption", size=(500, 400),
+                                        fontsize=10)
+    investment_chart = PygameLineChart(scenario_names[sim_no] + ": Investment", "Investment", fontsize=10)
+    price_chart = PygameLineChart(scenario_names[sim_no] + ": Price", "Price", fontsize=10)
+    employment_chart = PygameLineChart(scenario_names[sim_no] + ": Employment", "Employment", fontsize=10)
+    charts = {"output": output_chart,
+              "consumption": consumption_chart,
+              "investment": investment_chart,
+              "price": price_chart,
+              "employment": employment_chart}
+
     while in_sim and running:
 
         # poll for events
         # pygame.QUIT event means the user clicked X to close your window
-        for event in pygame.event.get():
+        for event in get_events():
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.KEYDOWN:
@@ -227,6 +228,9 @@ for sim_no in range(S):
                 if event.key == pygame.K_g:
                     print("g pressed!")
                     M0[sim_no] -= 0.1
+                if event.key == pygame.K_p:
+                    print("p pressed!")
+                    export_charts(charts, "neoclassicalSynthesis" + str(sim_no + 1) + "_")
             
             # Player has triggered an iteration
             if is_iter:
@@ -241,176 +245,77 @@ for sim_no in range(S):
                 N_star[sim_no] = N
                 P_star[sim_no] = P
 
-                C_time.append(C)
-                P_time.append(P)
-                N_time.append(N)
-                I_time.append(I)
-                Y_time.append(Y)
+                history.append(Y, P, N, C, I)
                 iteration_count += 1
+                if headless is not None:
+                    headless.record(sim_no, iteration_count, Y=Y, C=C, I=I, r=r, w=w, W=W, P=P, N=N, i0=i0[sim_no],
+                                    A=A[sim_no], G0=G0[sim_no], M0=M0[sim_no], P0=P0[sim_no])
 
                 ###########################
-                plot_min = 0
+                plot_min = max(0, iteration_count - MAX_PLOT_LENGTH)
                 plot_max = iteration_count
 
                 # Rerender the graph images
-                ## TODO need to fix these ugly plots!!!!!!!!
-                # Plot output
-                plt.plot(Y_time, color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Y")
-                plt_title = scenario_names[sim_no] + ": Output"
-                plt.title(plt_title, fontsize=10)
-                plt.xlim((plot_min, plot_max))
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-                output_surf = pygame.image.fromstring(raw_data, size, "RGB")
-                # Clear the plot
-                plt.clf()
-
-                 # Plot consumption
-                plt.plot(C_time, color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Consumption")
-                plt_title = scenario_names[sim_no] + ": Consumption"
-                plt.title(plt_title, fontsize=10)
-                plt.xlim((plot_min, plot_max))
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-                consumption_surf = pygame.image.fromstring(raw_data, (size), "RGB")
-                # Clear the plot
-                plt.clf()
-
-                # Plot investment
-                plt.plot(I_time, color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Investment")
-                plt_title = scenario_names[sim_no] + ": Investment"
-                plt.title(plt_title, fontsize=10)
-                plt.xlim((plot_min, plot_max))
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                investment_surf = pygame.image.fromstring(raw_data, size, "RGB")
-                investment_surf = pygame.transform.scale(investment_surf, (400, 360))
-                # Clear the plot
-                plt.clf()
-
-                # Plot price level
-                plt.plot(P_time, color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Price")
-                plt_title = scenario_names[sim_no] + ": Price"
-                plt.title(plt_title, fontsize=10)
-                plt.xlim((plot_min, plot_max))
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                price_surf = pygame.image.fromstring(raw_data, size, "RGB")
-                price_surf = pygame.transform.scale(price_surf, (400, 360))
-                # Clear the plot
-                plt.clf()
-
-                # Plot employment level
-                plt.plot(N_time, color='black', linewidth=2, linestyle='-')
-                plt.xlabel("Time")
-                plt.ylabel("Employment")
-                plt_title = scenario_names[sim_no] + ": Employment"
-                plt.title(plt_title, fontsize=10)
-                plt.xlim((plot_min, plot_max))
-                fig = plt.figure(plt_title)
-                fig.set_figwidth(5)
-                fig.set_figheight(4)
-
-                canvas = agg.FigureCanvasAgg(fig)
-                canvas.draw()
-                renderer = canvas.get_renderer()
-                raw_data = renderer.tostring_rgb()
-
-                size = canvas.get_width_height()
-
-                employment_surf = pygame.image.fromstring(raw_data, size, "RGB")
-                employment_surf = pygame.transform.scale(employment_surf, (400, 360))
-                # Clear the plot
-                plt.clf()
+                output_chart.show(history.window("Y"), plot_min, plot_max)
+                output_surf = output_chart.render()
+                consumption_chart.show(history.window("C"), plot_min, plot_max)
+                consumption_surf = consumption_chart.render()
+                investment_chart.show(history.window("I"), plot_min, plot_max)
+                investment_surf = investment_chart.render()
+                price_chart.show(history.window("P"), plot_min, plot_max)
+                price_surf = price_chart.render()
+                employment_chart.show(history.window("N"), plot_min, plot_max)
+                employment_surf = employment_chart.render()
+                charts_changed = True
                 ##########################
                 
                 # Wait for next iteration from player
                 is_iter = False
 
-            # fill the screen with a color to wipe away anything from last frame
-            screen.fill("purple")
-
             #########################
             # Update economic visuals
             #########################
 
             # Add simple text
-            iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, (255, 255, 255))
-            sim_text_surface = my_font.render(scenario_names[sim_no], True, (255, 255, 255))
-            Y_text_surface = my_font.render('Y: ' + str(Y_star[sim_no]), True, (255, 255, 255))
-            i0_text_surface = my_font.render('Autonomous investment: ' + str(i0[sim_no]), True, (255, 255, 255))
-            A_text_surface = my_font.render('Productivity shifter: ' + str(A[sim_no]), True, (255, 255, 255))
-            G0_text_surface = my_font.render('Government expenditure: ' + str(G0[sim_no]), True, (255, 255, 255))
-            M0_text_surface = my_font.render('Money supply: ' + str(M0[sim_no]), True, (255, 255, 255))
-            iter_text_surface = my_font.render('Iteration number: ' + str(iteration_count), True, (255, 255, 255))
+            sim_text_surface = text_cache.render(my_font, scenario_names[sim_no], (255, 255, 255))
+            Y_text_surface = Y_text.render(Y_star[sim_no])
+            i0_text_surface = i0_text.render(i0[sim_no])
+            A_text_surface = A_text.render(A[sim_no])
+            G0_text_surface = G0_text.render(G0[sim_no])
+            M0_text_surface = M0_text.render(M0[sim_no])
+            iter_text_surface = iter_text.render(iteration_count)
 
             # Render text on the page at the specified positions
-            screen.blit(iterate_text_surface, (50, 10)) 
-            screen.blit(sim_text_surface, (50, 100)) 
-            screen.blit(Y_text_surface, (50, 150))
-            screen.blit(i0_text_surface, (50, 200))
-            screen.blit(A_text_surface, (50, 250))
-            screen.blit(G0_text_surface, (50, 300)) 
-            screen.blit(M0_text_surface, (50, 350)) 
-            screen.blit(iter_text_surface, (50, 600)) 
+            scheduler.show("iterate_text", iterate_text_surface, (50, 10))
+            scheduler.show("sim_text", sim_text_surface, (50, 100))
+            scheduler.show("Y_text", Y_text_surface, (50, 150))
+            scheduler.show("i0_text", i0_text_surface, (50, 200))
+            scheduler.show("A_text", A_text_surface, (50, 250))
+            scheduler.show("G0_text", G0_text_surface, (50, 300))
+            scheduler.show("M0_text", M0_text_surface, (50, 350))
+            scheduler.show("iter_text", iter_text_surface, (50, 600))
 
             if (iteration_count > 0):
                 # add the graph images to the screen
-                screen.blit(output_surf, (1200,0))
-                screen.blit(consumption_surf, (1200,400))
-                screen.blit(investment_surf, (800,0))
-                screen.blit(price_surf, (800,360))
-                screen.blit(employment_surf, (400,350))
+                scheduler.show("output_chart", output_surf, (1200,0), changed=charts_changed)
+                scheduler.show("consumption_chart", consumption_surf, (1200,400), changed=charts_changed)
+                scheduler.show("investment_chart", investment_surf, (800,0), changed=charts_changed)
+                scheduler.show("price_chart", price_surf, (800,360), changed=charts_changed)
+                scheduler.show("employment_chart", employment_surf, (400,350), changed=charts_changed)
+                charts_changed = False
             ##########################
 
-            # flip() the display to put your work on screen
-            pygame.display.flip()
+            # Push only the changed regions to the display; frames in which nothing
+            # changed are skipped
+            scheduler.update()
+            if headless is not None:
+                headless.save_frame(screen)
 
             # limits FPS to 60
             # dt is delta time in seconds since last frame, used for framerate-
             # independent physics.
-            dt = clock.tick(60) / 1000
+            dt = clock.tick(60 if headless is None else 0) / 1000
 
+if headless is not None:
+    headless.finish()
 pygame.quit()
\ No newline at end of file
@@ -1,9 +1,21 @@
 import pygame
 import math
 
+from neoclassicalSynthesisSolver import iterate_economy
+from ringBuffer import RingBuffer
+from pygameText import TextCache, TextField
+from renderScheduler import RenderScheduler
+from simulationClock import SimulationClock
+from pygameCharts import PygameLineChart, export_charts
+from headless import HeadlessRun
+
 ##################
 # pygame setup
 ##################
+# --headless runs a scripted batch without a window (see headless.py)
+headless = HeadlessRun.from_args()
+get_events = pygame.event.get if headless is None else headless.events
+
 pygame.init()
 screen = pygame.display.set_mode((1280, 780))
 clock = pygame.time.Clock()
@@ -15,19 +27,9 @@ my_font = pygame.font.SysFont('Comic Sans MS', 14)
 font_color = (0, 0, 0)
 
 soft_blue = pygame.Color(173, 216, 230)  # R: 173, G: 216, B: 230
-##################
-
 
-##################
-# Matplotlib setup
-# Within pygame, see article here:
-# https://stackoverflow.com/questions/48093361/using-matplotlib-in-pygame
-##################
-import matplotlib
-matplotlib.use("Agg")
-
-import matplotlib.backends.backend_agg as agg
-import matplotlib.pyplot as plt
+# Only changed regions of the screen are redrawn
+scheduler = RenderScheduler(screen, soft_blue)
 ##################
 
 
@@ -77,108 +79,85 @@ Y = C = I = r = P = w = N = W = 1
 # https://macrosimulation.org/a_neoclassical_synthesis_model_is_lm_as_ad#directed-graph
 ##################
 
-def iterate_economy(C, I, G0, c0, c1, Y, T0, i0, i1, r, m0, M0, P, m2, m1, N, Nf, A, a, K, P0, b):
-        '''
-        sim_no: Simulation number (for saving simulation states in different scenarios)
-        C: Consumption
-        I: Investment
-        G0: Government expendeture
-        c0: Autonomous consumption
-        c1: Sensitivity of consumption with respect to income (marginal propensity to consume)
-        Y: Output of the economy
-        T0: Tax revenues
-        i0: Autonomous investment (animal spirits)
-        i1: Sensitivity of investment with respect to the interest rate
-        r: Real intrest rate
-        m0: Liquidity prefrence
-        M0: Money supply
-        P: Price level
-        m2: Sensitivity of money demand with respect to interest rate
-        m1: Sensitivity of money demand with respect to income
-        N: Employment 
-        Nf: Full employment/labor force
-        A: Productivity shifter (technology)
-        a: Capital elasticity of output
-        K: Exogenous capital stock
-        P0: Expected price level
-        b: Household preference for leisure
-        '''
-                
-        # Model equations
-        # Goods market equilibrium
-        Y = C + I + G0
-
-        # Consumption demand
-        C = c0 + c1 * (Y - T0)
-
-        # Investment demand
-        I = i0 - i1 * r
-
-        # Money market, solved for interest rate
-        r = (m0 - (M0 / P)) / m2 + m1 * Y / m2
-
-        # Unemployment rate
-        U = 1 - N / Nf
-
-        # Real wage
-        w = A * (1 - a) * (K ** a) * (N ** (-a))
-
-        # Nominal wage
-        W = (P0 * b * C) / (1 - (N / Nf))
-
-        # Price level
-        P = W / w
-
-        # Employment
-        N = (Y / (A * (K ** a))) ** (1 / (1 - a))
-
-        return Y, C, I, r, U, w, W, P, N
-
 # Enable this to automatically iterate
 AUTO_ITERATIOM = True
-if (AUTO_ITERATIOM):
-    pygame.time.set_timer(pygame.USEREVENT, 500)
+
+# Simulation speed, independent of the frame rate: steps per second when
+# iterating automatically (2 = one step every 500 ms), or None for as many
+# steps as fit in each frame. x toggles turbo (as fast as possible), the
+# up and down arrows double and halve the speed.
+STEPS_PER_SECOND = 2
+FPS = 30
+if headless is not None:
+    AUTO_ITERATIOM = False  # Steps come from the scripted space bar presses
+    FPS = 0  # Uncapped
+sim_clock = SimulationClock(STEPS_PER_SECOND if AUTO_ITERATIOM else 0, frame_budget=0.7 / FPS if FPS else 0.025)
 
 # Maximum number of iterations to display in each graph
 MAX_PLOT_LENGTH = 100
 
 # Count number of iterations for this simulation
 iteration_count = 0
-is_iter = False
 
-# Used for plotting the simulation over time
-Y_time = []
-P_time = []
-N_time = []
-C_time = []
-I_time = []
+# Used for plotting the simulation over time; only the periods on screen are kept
+history = RingBuffer(("Y", "P", "N", "C", "I"), MAX_PLOT_LENGTH + 1)
 
 # Append initial value
-Y_time.append(Y)
-P_time.append(P)
-N_time.append(N)
-C_time.append(C)
-I_time.append(I)
+history.append(Y, P, N, C, I)
+if headless is not None:
+    headless.record(0, iteration_count, Y=Y, C=C, I=I, r=r, w=w, W=W, P=P, N=N, i0=i0, A=A, G0=G0, M0=M0)
 
-# graph images to render
+# graph images to render, and whether they changed since last shown
+charts_changed = False
 employment_surf = None
 price_surf = None
 output_surf = None
 consumption_surf = None
 investment_surf = None
 
+# Charts of the simulation, created once and updated every step; p saves them as PNG
+output_chart = PygameLineChart(scenario_name + ": Output", "Y")
+consumption_chart = PygameLineChart(scenario_name + ": Consumption", "Consumption")
+investment_chart = PygameLineChart(scenario_name + ": Investment", "Investment")
+price_chart = PygameLineChart(scenario_name + ": Price", "Price")
+employment_chart = PygameLineChart(scenario_name + ": Employment", "Employment")
+charts = {"output": output_chart,
+          "consumption": consumption_chart,
+          "investment": investment_chart,
+          "price": price_chart,
+          "employment": employment_chart}
+
+# Text surfaces: static labels are rendered once, the numeric fields only
+# when their displayed value changes
+text_cache = TextCache()
+iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, font_color)
+sim_text_surface = my_font.render(scenario_name, True, font_color)
+Y_text = TextField(text_cache, my_font, 'Y: ', font_color)
+i0_text = TextField(text_cache, my_font, 'Autonomous investment: ', font_color)
+A_text = TextField(text_cache, my_font, 'Productivity shifter: ', font_color)
+G0_text = TextField(text_cache, my_font, 'Government expenditure: ', font_color)
+M0_text = TextField(text_cache, my_font, 'Money supply: ', font_color)
+iter_text = TextField(text_cache, my_font, 'Iteration number: ', font_color)
+
 while running:
     # poll for events
     # pygame.QUIT event means the user clicked X to close your window
-    for event in pygame.event.get():
-        if event.type == pygame.USEREVENT:
-            is_iter = True
+    for event in get_events():
         if event.type == pygame.QUIT:
             running = False
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
                 print("Space bar pressed!")
-                is_iter = True
+                sim_clock.request()
+            if event.key == pygame.K_x:
+                sim_clock.toggle_turbo()
+                print("x pressed! Turbo " + ("on" if sim_clock.turbo else "off"))
+            if event.key == pygame.K_UP:
+                sim_clock.scale(2)
+                print("Up pressed! " + str(sim_clock.steps_per_second) + " steps per second")
+            if event.key == pygame.K_DOWN:
+                sim_clock.scale(0.5)
+                print("Down pressed! " + str(sim_clock.steps_per_second) + " steps per second")
             if event.key == pygame.K_w:
                 print("w pressed!")
                 i0 += 0.1
@@ -203,12 +182,24 @@ while running:
             if event.key == pygame.K_g:
                 print("g pressed!")
                 M0 -= 0.1
+            if event.key == pygame.K_p:
+                print("p pressed!")
+                export_charts(charts, "neoclassicalSynthesis_")
         
-    # Player has triggered an iteration
-    if is_iter:
+    # Run the simulation steps due in this frame (automatic or from the player)
+    sim_clock.start_frame(dt)
+    while sim_clock.step():
         # Run economy updates
         Y, C, I, r, U, w, W, P, N = iterate_economy(C, I, G0, c0, c1, Y, T0, i0, i1, r, m0, M0, P, m2, m1, N, Nf, A, a, K, P0, b)
-        # Save results for different parameterizations in the arrays
+        history.append(Y, P, N, C, I)
+        iteration_count += 1
+        if headless is not None:
+            headless.record(0, iteration_count, Y=Y, C=C, I=I, r=r, w=w, W=W, P=P, N=N, i0=i0, A=A, G0=G0, M0=M0)
+
+    # The display shows the state after the last step of the frame, and the
+    # charts are drawn once per frame however many steps ran
+    if sim_clock.steps > 0:
+        # Save results
         Y_star = Y
         w_star = w
         C_star = C
@@ -217,176 +208,66 @@ while running:
         N_star = N
         P_star = P
 
-        C_time.append(C)
-        P_time.append(P)
-        N_time.append(N)
-        I_time.append(I)
-        Y_time.append(Y)
-        iteration_count += 1
-
         ###########################
         plot_min = max(0, iteration_count - MAX_PLOT_LENGTH)
         plot_max = iteration_count
 
         # Rerender the graph images
-        # # Plot output
-        plt.plot(Y_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Y")
-        plt_title = scenario_name + ": Output"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-        output_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        output_surf = pygame.transform.scale(output_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot consumption
-        plt.plot(C_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Consumption")
-        plt_title = scenario_name + ": Consumption"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-        consumption_surf = pygame.image.fromstring(raw_data, (size), "RGB")
-        consumption_surf = pygame.transform.scale(consumption_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot investment
-        plt.plot(I_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Investment")
-        plt_title = scenario_name + ": Investment"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-
-        investment_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        investment_surf = pygame.transform.scale(investment_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot price level
-        plt.plot(P_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Price")
-        plt_title = scenario_name + ": Price"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-
-        price_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        price_surf = pygame.transform.scale(price_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
-
-        # Plot employment level
-        plt.plot(N_time, color='black', linewidth=2, linestyle='-')
-        plt.xlabel("Time")
-        plt.ylabel("Employment")
-        plt_title = scenario_name + ": Employment"
-        plt.title(plt_title, fontsize=15)
-        plt.xlim((plot_min, plot_max))
-        fig = plt.figure(plt_title)
-        fig.set_figwidth(5)
-        fig.set_figheight(4)
-
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.tostring_rgb()
-
-        size = canvas.get_width_height()
-
-        employment_surf = pygame.image.fromstring(raw_data, size, "RGB")
-        employment_surf = pygame.transform.scale(employment_surf, (400, 360))
-        # Clear the plot
-        plt.clf()
+        output_chart.show(history.window("Y"), plot_min, plot_max)
+        output_surf = output_chart.render()
+        consumption_chart.show(history.window("C"), plot_min, plot_max)
+        consumption_surf = consumption_chart.render()
+        investment_chart.show(history.window("I"), plot_min, plot_max)
+        investment_surf = investment_chart.render()
+        price_chart.show(history.window("P"), plot_min, plot_max)
+        price_surf = price_chart.render()
+        employment_chart.show(history.window("N"), plot_min, plot_max)
+        employment_surf = employment_chart.render()
+        charts_changed = True
         ##########################
-        
-        # Wait for next iteration from player
-        is_iter = False
-
-    # fill the screen with a color to wipe away anything from last frame
-    screen.fill(soft_blue)
 
     #########################
     # Update economic visuals
     #########################
     # Add simple text
-    iterate_text_surface = my_font.render('Press the space bar to iterate the economy', True, font_color)
-    sim_text_surface = my_font.render(scenario_name, True, font_color)
-    Y_text_surface = my_font.render('Y: ' + str(Y_star), True, font_color)
-    i0_text_surface = my_font.render('Autonomous investment: ' + str(math.ceil(i0 * 100) / 100), True, font_color)
-    A_text_surface = my_font.render('Productivity shifter: ' + str(math.ceil(A * 100) / 100), True, font_color)
-    G0_text_surface = my_font.render('Government expenditure: ' + str(math.ceil(G0 * 100) / 100), True, font_color)
-    M0_text_surface = my_font.render('Money supply: ' + str(math.ceil(M0 * 100) / 100), True, font_color)
-    iter_text_surface = my_font.render('Iteration number: ' + str(iteration_count), True, font_color)
+    Y_text_surface = Y_text.render(Y_star)
+    i0_text_surface = i0_text.render(math.ceil(i0 * 100) / 100)
+    A_text_surface = A_text.render(math.ceil(A * 100) / 100)
+    G0_text_surface = G0_text.render(math.ceil(G0 * 100) / 100)
+    M0_text_surface = M0_text.render(math.ceil(M0 * 100) / 100)
+    iter_text_surface = iter_text.render(iteration_count)
 
     # Render text on the page at the specified positions
-    screen.blit(iterate_text_surface, (20, 10)) 
-    screen.blit(sim_text_surface, (20, 50)) 
-    screen.blit(Y_text_surface, (20, 80))
-    screen.blit(i0_text_surface, (20, 110))
-    screen.blit(A_text_surface, (20, 140))
-    screen.blit(G0_text_surface, (20, 190)) 
-    screen.blit(M0_text_surface, (20, 220)) 
-    screen.blit(iter_text_surface, (20, 400)) 
+    scheduler.show("iterate_text", iterate_text_surface, (20, 10))
+    scheduler.show("sim_text", sim_text_surface, (20, 50))
+    scheduler.show("Y_text", Y_text_surface, (20, 80))
+    scheduler.show("i0_text", i0_text_surface, (20, 110))
+    scheduler.show("A_text", A_text_surface, (20, 140))
+    scheduler.show("G0_text", G0_text_surface, (20, 190))
+    scheduler.show("M0_text", M0_text_surface, (20, 220))
+    scheduler.show("iter_text", iter_text_surface, (20, 400))
 
     if (iteration_count > 0):
         #add the graph images to the screen
-        screen.blit(output_surf, (400,0))
-        screen.blit(consumption_surf, (800,0))
-        screen.blit(investment_surf, (400,360))
-        screen.blit(price_surf, (800,360))
-        screen.blit(employment_surf, (0,420))
+        scheduler.show("output_chart", output_surf, (400,0), changed=charts_changed)
+        scheduler.show("consumption_chart", consumption_surf, (800,0), changed=charts_changed)
+        scheduler.show("investment_chart", investment_surf, (400,360), changed=charts_changed)
+        scheduler.show("price_chart", price_surf, (800,360), changed=charts_changed)
+        scheduler.show("employment_chart", employment_surf, (0,420), changed=charts_changed)
+        charts_changed = False
     ##########################
 
-    # flip() the display to put your work on screen
-    pygame.display.flip()
+    # Push only the changed regions to the display; frames in which nothing
+    # changed are skipped
+    scheduler.update()
+    if headless is not None:
+        headless.save_frame(screen)
 
     # limits FPS to 30
     # dt is delta time in seconds since last frame, used for framerate-
     # independent physics.
-    dt = clock.tick(30) / 1000
+    dt = clock.tick(FPS) / 1000
 
+if headless is not None:
+    headless.finish()
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,130 @@
+import numpy as np
+
+from fixedPointAcceleration import FixedPointResult, solve_fixed_point
+from modelSpecs import NEOCLASSICAL_SYNTHESIS
+
+##################
+# Neoclassical synthesis (IS-LM-AS-AD) model solvers
+# https://macrosimulation.org/a_neoclassical_synthesis_model_is_lm_as_ad
+##################
+
+# Order of the endogenous variables in the state vector, as in the model
+# specification. Its dependency graph (modelGraph.block_ordering) puts every
+# variable but U in one simultaneous block, so unlike neoclassicalSolver.py
+# there is no block-recursive solver: it would iterate the same system
+# without the acceleration of solve_synthesis.
+VARIABLES = NEOCLASSICAL_SYNTHESIS.variables
+
+def iterate_economy(C, I, G0, c0, c1, Y, T0, i0, i1, r, m0, M0, P, m2, m1, N, Nf, A, a, K, P0, b):
+    '''
+    One step of the equations of modelSpecs.NEOCLASSICAL_SYNTHESIS (binds
+    the step function on every call, see make_step)
+    C: Consumption
+    I: Investment
+    G0: Government expendeture
+    c0: Autonomous consumption
+    c1: Sensitivity of consumption with respect to income (marginal propensity to consume)
+    Y: Output of the economy
+    T0: Tax revenues
+    i0: Autonomous investment (animal spirits)
+    i1: Sensitivity of investment with respect to the interest rate
+    r: Real intrest rate
+    m0: Liquidity prefrence
+    M0: Money supply
+    P: Price level
+    m2: Sensitivity of money demand with respect to interest rate
+    m1: Sensitivity of money demand with respect to income
+    N: Employment
+    Nf: Full employment/labor force
+    A: Productivity shifter (technology)
+    a: Capital elasticity of output
+    K: Exogenous capital stock
+    P0: Expected price level
+    b: Household preference for leisure
+    '''
+    step = make_step(G0, c0, c1, T0, i0, i1, m0, M0, m2, m1, Nf, A, a, K, P0, b)
+    # The equations in order; U, w and W are recomputed before they are
+    # read, so their old values are not needed
+    return step(Y, C, I, r, None, None, None, P, N)
+
+
+def make_step(G0, c0, c1, T0, i0, i1, m0, M0, m2, m1, Nf, A, a, K, P0, b):
+    '''
+    Step function generated from modelSpecs.NEOCLASSICAL_SYNTHESIS (the only
+    place the equations are written out): step(*state) -> new state,
+    ordered as VARIABLES. Bind once and call it in loops.
+    Arguments as in iterate_economy.
+    '''
+    return NEOCLASSICAL_SYNTHESIS.bind(G0=G0, c0=c0, c1=c1, T0=T0, i0=i0, i1=i1, m0=m0, M0=M0, m2=m2, m1=m1,
+                                       Nf=Nf, A=A, a=a, K=K, P0=P0, b=b)
+
+
+def make_update(G0, c0, c1, T0, i0, i1, m0, M0, m2, m1, Nf, A, a, K, P0, b):
+    '''
+    One step of the model as a map on the state vector
+    (Y, C, I, r, U, w, W, P, N), for use with solve_fixed_point.
+    Arguments as in iterate_economy.
+    '''
+    step = make_step(G0, c0, c1, T0, i0, i1, m0, M0, m2, m1, Nf, A, a, K, P0, b)
+
+    def update(x):
+        return np.array(step(*x))
+
+    return update
+
+
+def solve_synthesis(G0, c0, c1, T0, i0, i1, m0, M0, m2, m1, Nf, A, a, K, P0, b,
+                    accelerator="anderson", tol=1e-10, max_iter=1000,
+                    initial=(1, 1, 1, 1, 1, 1, 1, 1, 1), **options):
+    '''
+    Solve for the equilibrium with an accelerated fixed-point iteration.
+    Returns a FixedPointResult whose x is ordered as VARIABLES.
+    accelerator: "plain", "damped", "aitken" or "anderson"
+    tol: Tolerance on the residual
+    max_iter: Cap on the number of model steps
+    initial: Starting values for (Y, C, I, r, U, w, W, P, N)
+    options: Passed to the accelerator (omega for damped, m for anderson)
+    Other arguments as in iterate_economy.
+    '''
+    update = make_update(G0, c0, c1, T0, i0, i1, m0, M0, m2, m1, Nf, A, a, K, P0, b)
+
+    return solve_fixed_point(update, initial, accelerator=accelerator, tol=tol,
+                             max_iter=max_iter, **options)
+
+
+##################
+# Batched fixed-point solver
+# Plain iteration of the model step on length S arrays, so many scenarios
+# are solved with one set of array operations per iteration. Scenarios that
+# converged (or diverged) are frozen and no longer updated.
+##################
+
+def solve_synthesis_batch(G0, c0, c1, T0, i0, i1, m0, M0, m2, m1, Nf, A, a, K, P0, b,
+                          tol=1e-10, max_iter=1000, initial=(1, 1, 1, 1, 1, 1, 1, 1, 1)):
+    '''
+    Solve all scenarios at once. Returns a FixedPointResult whose x has
+    shape (9, S), ordered as VARIABLES, and whose residual and converged are
+    length S arrays; iterations is the number of sweeps over the batch.
+    tol: Tolerance on the residual of each scenario
+    max_iter: Cap on the number of iterations
+    initial: Starting values for (Y, C, I, r, U, w, W, P, N), shape (9,) or (9, S)
+    Other arguments as in iterate_economy, as scalars or length S arrays.
+    '''
+    params = dict(G0=G0, c0=c0, c1=c1, T0=T0, i0=i0, i1=i1, m0=m0, M0=M0, m2=m2, m1=m1,
+                  Nf=Nf, A=A, a=a, K=K, P0=P0, b=b)
+    S = np.broadcast(*(np.asarray(p) for p in params.values())).size
+    x = np.array(np.broadcast_to(np.asarray(initial, dtype=float).reshape(9, -1), (9, S)))
+    residual = np.full(S, np.inf)
+    active = np.ones(S, dtype=bool)
+
+    iterations = 0
+    while iterations < max_iter and active.any():
+        iterations += 1
+        pa = {name: p[active] if np.ndim(p) else p for name, p in params.items()}
+        with np.errstate(all="ignore"):
+            g = np.array(make_step(**pa)(*x[:, active]))
+            residual[active] = np.max(np.abs(g - x[:, active]), axis=0)
+        x[:, active] = g
+        active &= (residual >= tol) & np.isfinite(residual)
+
+    return FixedPointResult(x, iterations, residual, residual < tol, 0)
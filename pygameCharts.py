@@ -0,0 +1,326 @@
+import math
+import pygame
+import numpy as np
+
+##################
+# Matplotlib setup
+# Within pygame, see article here:
+# https://stackoverflow.com/questions/48093361/using-matplotlib-in-pygame
+# matplotlib is only imported once a matplotlib chart is built, so the
+# native pygame charts work without it.
+##################
+def _matplotlib():
+    '''
+    Figure and FigureCanvasAgg, importing matplotlib on first use
+    '''
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    return Figure, FigureCanvasAgg
+##################
+
+class _AggChart:
+    '''
+    A matplotlib figure on its own Agg canvas, kept alive across steps.
+    Figures made this way are not registered with pyplot, so they are freed
+    with the chart and never count towards pyplot's open-figure warning.
+    The figure is rasterized at exactly the pixel size of the surface, and
+    that surface is a view of the Agg buffer itself: render copies nothing
+    and allocates nothing once the first frame is drawn.
+    width: Figure width in inches (sets the size of text and lines
+           relative to the chart, as matplotlib's figsize does)
+    size: Size in pixels of the pygame surface handed out by render
+    '''
+    def __init__(self, width, size):
+        self.size = tuple(size)
+        dpi = self.size[0] / width
+        Figure, FigureCanvasAgg = _matplotlib()
+        self.fig = Figure(figsize=(width, self.size[1] / dpi), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self._renderer = None
+        self._surf = None
+
+    def render(self):
+        '''
+        Draw the chart and return it as a pygame surface. The same surface is
+        returned on every call and is overwritten by the next render, so
+        blit it (or copy it) before rendering this chart again.
+        '''
+        self.canvas.draw()
+        renderer = self.canvas.get_renderer()
+        if renderer is not self._renderer:
+            # Agg only replaces its renderer (and buffer) when the figure's
+            # pixel size or dpi changes; wrap the new buffer once
+            self._renderer = renderer
+            self._buffer = renderer.buffer_rgba()
+            self._surf = pygame.image.frombuffer(self._buffer, self.canvas.get_width_height(), "RGBA")
+        return self._surf
+
+
+class LineChart(_AggChart):
+    '''
+    A matplotlib line chart of one series that lives across simulation steps.
+    The figure, axes, labels and line are created once; every step only
+    swaps the line data and the x-limits before redrawing.
+    title: Chart title
+    ylabel: Label of the y-axis
+    size: Size in pixels of the pygame surface handed out by render
+    fontsize: Title font size
+    '''
+    def __init__(self, title, ylabel, size=(400, 360), fontsize=15):
+        super().__init__(5, size)
+
+        self.ax = self.fig.add_subplot()
+        self.ax.set_xlabel("Time")
+        self.ax.set_ylabel(ylabel)
+        self.ax.set_title(title, fontsize=fontsize)
+        self.line, = self.ax.plot([], [], color='black', linewidth=2, linestyle='-')
+
+    def update(self, series, plot_min, plot_max):
+        '''
+        Show series[plot_min:plot_max + 1] on the x-range (plot_min, plot_max)
+        series: Full history of the series (list or array)
+        plot_min: First period in view
+        plot_max: Last period in view
+        '''
+        # Only the visible window is handed to matplotlib, so the cost of a
+        # redraw does not grow with the length of the history
+        self.show(np.asarray(series[plot_min:plot_max + 1], dtype=float), plot_min, plot_max)
+
+    def show(self, window, plot_min, plot_max):
+        '''
+        Show window, the values of periods plot_min, plot_min + 1, ..., on the
+        x-range (plot_min, plot_max)
+        '''
+        self.line.set_data(np.arange(plot_min, plot_min + len(window)), window)
+        self.ax.set_xlim((plot_min, plot_max))
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
+
+
+class DualAxisChart(_AggChart):
+    '''
+    Consumption and investment on separate y-axes (Figure 4 of
+    basicModels.py), built once and reused across steps
+    title: Chart title
+    size: Size in pixels of the pygame surface handed out by render
+    '''
+    def __init__(self, title, size=(640, 480)):
+        super().__init__(6.4, size)
+
+        self.ax1 = self.fig.add_subplot()
+        self.ax1.set_title(title, fontsize=10)
+        self.C_line, = self.ax1.plot([], [], color='black', linewidth=2, linestyle='-', label='C')
+        self.ax1.set_xlabel("Time")
+        self.ax1.set_ylabel("C", color='black')
+        self.ax1.tick_params(axis='y', labelcolor='black')
+
+        self.ax2 = self.ax1.twinx()
+        self.I_line, = self.ax2.plot([], [], color='black', linewidth=2, linestyle='--', label='I')
+        self.ax2.set_ylabel("I", color='black')
+        self.ax2.tick_params(axis='y', labelcolor='black')
+        self.ax2.legend([self.C_line, self.I_line], ['C', 'I'], loc='right')
+
+    def update(self, time, C, I):
+        '''
+        time: Periods on the x-axis
+        C: Consumption in those periods
+        I: Investment in those periods
+        '''
+        self.C_line.set_data(time, C)
+        self.I_line.set_data(time, I)
+        for ax in (self.ax1, self.ax2):
+            ax.relim()
+            ax.autoscale_view()
+
+
+def _nice_ticks(lo, hi, count=6, integer=False):
+    '''
+    Round tick positions covering [lo, hi], stepping by 1, 2, 2.5 or 5 times
+    a power of ten, and the number of decimals to print them with
+    lo, hi: Axis limits
+    count: Rough number of ticks wanted
+    integer: Only use whole-number steps (for periods)
+    '''
+    raw = (hi - lo) / count
+    magnitude = 10.0 ** math.floor(math.log10(raw))
+    for multiple in (1, 2, 2.5, 5, 10):
+        if multiple * magnitude >= raw:
+            break
+    if multiple == 10:
+        multiple, magnitude = 1, magnitude * 10
+    step = multiple * magnitude
+    if integer and step < 1:
+        step = multiple = magnitude = 1
+
+    first = math.ceil(lo / step - 1e-9) * step
+    ticks = np.arange(first, hi + step * 1e-9, step)
+    decimals = max(0, -round(math.log10(magnitude)) + (multiple == 2.5))
+    return ticks, decimals
+
+
+class PygameLineChart:
+    '''
+    A line chart of one series drawn with pygame alone, for live views at
+    hundreds of steps per second. Frame, title and axis labels are drawn
+    once onto a cached background; each render blits that background, the
+    tick labels (themselves cached by text) and the polyline of the
+    visible window. Same interface as LineChart, with export() as the
+    matplotlib path for high-quality images.
+    title: Chart title
+    ylabel: Label of the y-axis
+    size: Size in pixels of the pygame surface handed out by render
+    fontsize: Title font size, in points on a 5 inch wide figure (as LineChart)
+    '''
+    MAX_CACHED_LABELS = 512
+
+    def __init__(self, title, ylabel, size=(400, 360), fontsize=15):
+        self.title = title
+        self.ylabel = ylabel
+        self.size = tuple(size)
+        self.fontsize = fontsize
+
+        # Points to pixels as matplotlib would on a 5 inch wide figure;
+        # pygame's default font draws smaller than its nominal size
+        dpi = self.size[0] / 5
+        pygame.font.init()
+        def font(points):
+            return pygame.font.Font(None, max(14, round(points * dpi / 72 * 1.35)))
+        title_font = font(fontsize)
+        label_font = font(10)
+        self.tick_font = font(10)
+
+        width, height = self.size
+        top = title_font.get_height() + 12
+        self.plot = pygame.Rect(62, top, width - 62 - 14, height - top - 42)
+
+        self.background = pygame.Surface(self.size)
+        self.background.fill("white")
+        text = title_font.render(title, True, "black")
+        self.background.blit(text, text.get_rect(midtop=(self.plot.centerx, 6)))
+        text = label_font.render("Time", True, "black")
+        self.background.blit(text, text.get_rect(midbottom=(self.plot.centerx, height - 4)))
+        text = pygame.transform.rotate(label_font.render(ylabel, True, "black"), 90)
+        self.background.blit(text, text.get_rect(midleft=(4, self.plot.centery)))
+        pygame.draw.rect(self.background, "black", self.plot.inflate(2, 2), 1)
+
+        self.surf = pygame.Surface(self.size)
+        self._labels = {}
+        self._export_chart = None
+        self.window = np.empty(0)
+        self.plot_min = 0
+        self.plot_max = 1
+
+    def update(self, series, plot_min, plot_max):
+        '''
+        Show series[plot_min:plot_max + 1] on the x-range (plot_min, plot_max)
+        series: Full history of the series (list or array)
+        plot_min: First period in view
+        plot_max: Last period in view
+        '''
+        self.show(np.asarray(series[plot_min:plot_max + 1], dtype=float), plot_min, plot_max)
+
+    def show(self, window, plot_min, plot_max):
+        '''
+        Show window, the values of periods plot_min, plot_min + 1, ..., on the
+        x-range (plot_min, plot_max)
+        '''
+        self.window = window
+        self.plot_min = plot_min
+        self.plot_max = plot_max
+
+    def _label(self, text):
+        # Tick labels repeat from step to step, so render each text once
+        surf = self._labels.get(text)
+        if surf is None:
+            if len(self._labels) >= self.MAX_CACHED_LABELS:
+                self._labels.clear()
+            surf = self._labels[text] = self.tick_font.render(text, True, "black")
+        return surf
+
+    def render(self):
+        '''
+        Draw the chart and return it as a pygame surface. The same surface is
+        returned on every call and is overwritten by the next render.
+        '''
+        surf = self.surf
+        plot = self.plot
+        surf.blit(self.background, (0, 0))
+
+        x0 = self.plot_min
+        x1 = max(self.plot_max, x0 + 1)
+        x = np.arange(x0, x0 + len(self.window))
+        finite = np.isfinite(self.window)
+        y = self.window[finite]
+        x = x[finite]
+        if len(y) == 0:
+            return surf
+
+        # y-limits with a 5% margin, as matplotlib's autoscale
+        y0, y1 = y.min(), y.max()
+        margin = (y1 - y0) * 0.05 if y1 > y0 else max(abs(y0) * 0.05, 0.05)
+        y0, y1 = y0 - margin, y1 + margin
+
+        ticks, decimals = _nice_ticks(x0, x1, integer=True)
+        for tick in ticks:
+            px = plot.left + (tick - x0) * plot.width / (x1 - x0)
+            pygame.draw.line(surf, "black", (px, plot.bottom), (px, plot.bottom + 4))
+            text = self._label(f"{tick:.{decimals}f}")
+            surf.blit(text, text.get_rect(midtop=(px, plot.bottom + 6)))
+        ticks, decimals = _nice_ticks(y0, y1)
+        for tick in ticks:
+            py = plot.bottom - (tick - y0) * plot.height / (y1 - y0)
+            pygame.draw.line(surf, "black", (plot.left - 4, py), (plot.left, py))
+            text = self._label(f"{tick:.{decimals}f}")
+            surf.blit(text, text.get_rect(midright=(plot.left - 6, py)))
+
+        px = plot.left + (x - x0) * (plot.width / (x1 - x0))
+        py = plot.bottom - (y - y0) * (plot.height / (y1 - y0))
+        surf.set_clip(plot)
+        if len(y) > 1:
+            pygame.draw.lines(surf, "black", False, np.column_stack((px, py)).tolist(), 2)
+        else:
+            pygame.draw.circle(surf, "black", (px[0], py[0]), 2)
+        surf.set_clip(None)
+        return surf
+
+    def export(self, path, **options):
+        '''
+        Save the current view through matplotlib (imported on first export)
+        path: File name; the format follows its extension
+        options: Passed on to Figure.savefig (dpi=..., ...)
+        '''
+        if self._export_chart is None:
+            self._export_chart = LineChart(self.title, self.ylabel, self.size, self.fontsize)
+        self._export_chart.show(self.window, self.plot_min, self.plot_max)
+        self._export_chart.fig.savefig(path, **options)
+
+
+def export_charts(charts, prefix):
+    '''
+    Save every chart as prefix + name + ".png" through matplotlib
+    charts: Dict of name: chart (PygameLineChart)
+    prefix: Start of the file names, e.g. a directory and model name
+    '''
+    for name, chart in charts.items():
+        chart.export(prefix + name + ".png")
+        print("Saved " + prefix + name + ".png")
+
+
+class FigurePool:
+    '''
+    A fixed set of pre-built charts, one per key (e.g. per scenario), that
+    are handed out again on every request instead of building new figures
+    make_chart: Function of the key that builds its chart
+    keys: Keys to build charts for
+    '''
+    def __init__(self, make_chart, keys):
+        self.charts = {key: make_chart(key) for key in keys}
+
+    def get(self, key):
+        return self.charts[key]
+
+    def close(self):
+        self.charts.clear()
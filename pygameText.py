@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+import pygame
+
+##################
+# Cached text rendering for the pygame scripts
+# Font rasterization is slow compared to a blit, and the text on screen
+# changes at most once per simulation step while frames are drawn 30-60
+# times a second.
+##################
+
+class TextCache:
+    '''
+    Rendered text surfaces keyed by (text, color, font), least recently used
+    evicted first
+    capacity: Maximum number of surfaces kept
+    '''
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        '''
+        The surface of font.render(text, antialias, color), rendered only if
+        it is not in the cache
+        '''
+        if isinstance(color, pygame.Color):
+            color = tuple(color)  # pygame.Color is not hashable
+        key = (text, color, font, antialias)
+
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surf
+
+        self.misses += 1
+        surf = self.surfaces[key] = font.render(text, antialias, color)
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surf
+
+
+class TextField:
+    '''
+    A line of text made of a fixed label and a value, e.g. 'Y: ' + str(Y),
+    that is only looked up again when the displayed value changes
+    cache: TextCache to render through
+    font: pygame font
+    label: Text in front of the value
+    color: Text color
+    '''
+    def __init__(self, cache, font, label, color):
+        self.cache = cache
+        self.font = font
+        self.label = label
+        self.color = color
+        self.text = None
+        self.surf = None
+
+    def render(self, value):
+        '''
+        Surface showing the label followed by str(value)
+        '''
+        text = self.label + str(value)
+        if text != self.text:
+            self.text = text
+            self.surf = self.cache.render(self.font, text, self.color)
+        return self.surf
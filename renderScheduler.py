@@ -0,0 +1,100 @@
+import pygame
+
+##################
+# Dirty-rectangle rendering for the pygame scripts
+# Instead of filling the screen, re-blitting everything and flipping every
+# frame, the scripts hand each text line and chart to the scheduler, which
+# redraws and pushes to the display only the regions that changed. A frame
+# in which nothing changed costs no drawing at all.
+##################
+
+class RenderScheduler:
+    '''
+    Tracks what is shown where on the screen and updates only the changed
+    regions with pygame.display.update(rects)
+    screen: Display surface
+    background: Background color
+    '''
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self.slots = {}  # key: (surface, rect), in drawing order
+        self.dirty = []
+        self.full = True
+        self.frames = 0
+        self.skipped = 0
+
+    def invalidate(self):
+        '''
+        Clear the screen and forget everything shown; the next update
+        redraws the whole display (e.g. when a new scenario starts)
+        '''
+        self.slots.clear()
+        self.dirty.clear()
+        self.full = True
+
+    def show(self, key, surf, pos, changed=False):
+        '''
+        Show surf at pos in the slot named key. Nothing is redrawn if the
+        slot already shows this surface, unless changed is True (for
+        surfaces redrawn in place, such as the charts).
+        key: Name of the slot, e.g. "Y_text" or "output_chart"
+        surf: Surface to show
+        pos: Top left corner on the screen
+        changed: The surface's contents changed since it was last shown
+        '''
+        rect = surf.get_rect(topleft=pos)
+        previous = self.slots.get(key)
+        if previous is not None and previous[0] is surf and previous[1] == rect and not changed:
+            return
+
+        self.slots[key] = (surf, rect)
+        if self.full:
+            return
+
+        # Text is drawn with a transparent background and may be shorter than
+        # before, so clear the old and new area first, then put back
+        # whatever else overlaps it
+        area = rect if previous is None else rect.union(previous[1])
+        self._clear(area, key)
+        self.screen.blit(surf, rect)
+        self.dirty.append(area)
+
+    def hide(self, key):
+        '''
+        Remove the slot named key from the screen
+        '''
+        previous = self.slots.pop(key, None)
+        if previous is not None and not self.full:
+            self._clear(previous[1], key)
+            self.dirty.append(previous[1])
+
+    def _clear(self, area, key):
+        self.screen.fill(self.background, area)
+        self.screen.set_clip(area)
+        for other, (surf, rect) in self.slots.items():
+            if other != key and rect.colliderect(area):
+                self.screen.blit(surf, rect)
+        self.screen.set_clip(None)
+
+    def update(self):
+        '''
+        Push this frame's changes to the display. Returns False if nothing
+        changed and the frame was skipped.
+        '''
+        self.frames += 1
+        if self.full:
+            self.screen.fill(self.background)
+            for surf, rect in self.slots.values():
+                self.screen.blit(surf, rect)
+            pygame.display.flip()
+            self.full = False
+            return True
+
+        if not self.dirty:
+            self.skipped += 1
+            return False
+
+        pygame.display.update(self.dirty)
+        self.dirty.clear()
+        return True
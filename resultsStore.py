@@ -0,0 +1,211 @@
+import json
+import mmap
+import os
+
+import numpy as np
+
+##################
+# Columnar results on disk
+# A store is a directory with one .npy file per variable (column) and a
+# meta.json header listing the columns, the model parameters and the
+# scenario blocks appended so far:
+#
+#   sweep/meta.json
+#   sweep/Y.npy, sweep/N.npy, ...   shape (rows,) or (rows, Q) for series
+#
+# Blocks of scenarios are appended to the end of every column, and columns
+# are read back through np.memmap, so opening a store costs nothing and a
+# slice only reads the pages it touches.
+##################
+
+META_FILE = "meta.json"
+HEADER_SIZE = 128  # Fixed .npy header length, so the shape can be rewritten in place
+
+def _npy_header(dtype, shape):
+    # .npy version 1.0 header of exactly HEADER_SIZE bytes
+    header = repr({"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                   "fortran_order": False,
+                   "shape": tuple(shape)})
+    header = header.ljust(HEADER_SIZE - 10 - 1) + "\n"
+    if len(header) != HEADER_SIZE - 10:
+        raise ValueError("shape " + str(shape) + " does not fit in the .npy header")
+    return np.lib.format.MAGIC_PREFIX + b"\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+class ResultsStore:
+    '''
+    A directory of column files that grows by blocks of scenarios; open with
+    ResultsStore.create or ResultsStore(path)
+    path: Directory of the store
+    '''
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self._columns = {}  # Memory maps opened so far
+
+    @classmethod
+    def create(cls, path, columns, parameters=None, dtypes=None):
+        '''
+        Create an empty store
+        path: Directory, created if needed (must not hold a store already)
+        columns: Column names, or dict of name: shape of one row, e.g.
+                 {"Y": (), "C": (Q,)} for a scalar and a series per scenario
+        parameters: Model parameters shared by all blocks (JSON serializable;
+                    NumPy numbers and arrays become numbers and lists)
+        dtypes: Dict of name: dtype for columns that are not float64
+        '''
+        if not isinstance(columns, dict):
+            columns = {name: () for name in columns}
+        meta = {"rows": 0,
+                "columns": {name: {"dtype": np.dtype((dtypes or {}).get(name, np.float64)).str,
+                                   "shape": [int(size) for size in shape]}
+                            for name, shape in columns.items()},
+                "parameters": parameters or {},
+                "blocks": []}
+        # Plain JSON values, and a failure on a header that cannot be
+        # written, before any file is created
+        meta = json.loads(json.dumps(meta, default=_plain))
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            raise FileExistsError("a results store already exists in " + path)
+        for name, column in meta["columns"].items():
+            with open(os.path.join(path, name + ".npy"), "wb") as f:
+                f.write(_npy_header(column["dtype"], [0] + column["shape"]))
+        _write_meta(path, meta)
+        return cls(path)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    @property
+    def columns(self):
+        return list(self.meta["columns"])
+
+    @property
+    def parameters(self):
+        return self.meta["parameters"]
+
+    @property
+    def blocks(self):
+        '''
+        The blocks appended so far: dicts with name, start, stop and the
+        scenario definitions given to append
+        '''
+        return self.meta["blocks"]
+
+    def append(self, values, name=None, **scenarios):
+        '''
+        Append a block of scenarios to every column
+        values: Dict of column name: array with one row per scenario
+        name: Name of the block (default: block<number>)
+        scenarios: Scenario definitions of the block, stored in the header
+                   (JSON serializable as for create, e.g.
+                   scenario_names=[...], M0=[5, 6])
+        '''
+        missing = set(self.meta["columns"]) - set(values)
+        if missing:
+            raise ValueError("no values for columns " + ", ".join(sorted(missing)))
+        unknown = set(values) - set(self.meta["columns"])
+        if unknown:
+            raise ValueError("the store has no columns " + ", ".join(sorted(unknown)))
+
+        rows = None
+        arrays = {}
+        for column, spec in self.meta["columns"].items():
+            array = np.ascontiguousarray(values[column], dtype=spec["dtype"])
+            if array.shape[1:] != tuple(spec["shape"]):
+                raise ValueError("column " + column + " expects rows of shape " + str(tuple(spec["shape"])) +
+                                 ", got " + str(array.shape[1:]))
+            if rows is not None and len(array) != rows:
+                raise ValueError("all columns of a block need the same number of rows")
+            rows = len(array)
+            arrays[column] = array
+
+        # As plain JSON values, checked before any data is written
+        block = json.loads(json.dumps(dict(scenarios, name=name or "block" + str(len(self.meta["blocks"]))),
+                                      default=_plain))
+
+        start = self.meta["rows"]
+        for column, array in arrays.items():
+            spec = self.meta["columns"][column]
+            with open(os.path.join(self.path, column + ".npy"), "r+b") as f:
+                # Data first, then the shape; a crash in between leaves the
+                # old shape, and the extra bytes are ignored
+                f.seek(HEADER_SIZE + start * np.dtype(spec["dtype"]).itemsize * int(np.prod(spec["shape"])))
+                f.write(array.tobytes())
+                f.truncate()
+                f.seek(0)
+                f.write(_npy_header(spec["dtype"], [start + rows] + spec["shape"]))
+
+        self.meta["rows"] = start + rows
+        self.meta["blocks"].append(dict(block, start=start, stop=start + rows))
+        _write_meta(self.path, self.meta)
+        self._columns.clear()
+        return self.meta["blocks"][-1]
+
+    def column(self, name):
+        '''
+        Memory-mapped column (read only); nothing is read until indexed
+        name: Column name
+        '''
+        if name not in self._columns:
+            if self.meta["rows"] == 0:
+                spec = self.meta["columns"][name]
+                return np.empty([0] + spec["shape"], dtype=spec["dtype"])
+            # The header's row count is the one to trust: a block whose
+            # append was interrupted may be in some column files already
+            self._columns[name] = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")[:self.meta["rows"]]
+        return self._columns[name]
+
+    def read(self, name, start=None, stop=None, step=None):
+        '''
+        Rows start:stop:step of a column, read into memory
+        '''
+        return np.array(self.column(name)[start:stop:step])
+
+    def sample(self, name, points=10000):
+        '''
+        About `points` evenly spaced rows of a column, e.g. for plotting a
+        column too long to read whole
+        '''
+        step = max(1, len(self) // points)
+        if step == 1:
+            return self.read(name)
+        # Every sampled row is on its own page: map the file separately and
+        # turn off read-ahead on it, which would read far more than the rows
+        # sampled (about twice as fast from a cold cache)
+        column = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        if hasattr(mmap, "MADV_RANDOM"):
+            column._mmap.madvise(mmap.MADV_RANDOM)
+        return np.array(column[:len(self):step])
+
+    def block(self, key):
+        '''
+        Memory-mapped columns of one block
+        key: Block name or index
+        '''
+        if isinstance(key, int):
+            block = self.blocks[key]
+        else:
+            block = next((b for b in self.blocks if b["name"] == key), None)
+            if block is None:
+                raise KeyError(key)
+        return {name: self.column(name)[block["start"]:block["stop"]] for name in self.columns}
+
+
+def _plain(value):
+    # NumPy scalars and arrays in the header as plain numbers and lists
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError("cannot store " + type(value).__name__ + " in the store header")
+
+
+def _write_meta(path, meta):
+    # Write the header to a temporary file and swap it in, so a crash never
+    # leaves a half-written header
+    temporary = os.path.join(path, META_FILE + ".tmp")
+    with open(temporary, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(temporary, os.path.join(path, META_FILE))
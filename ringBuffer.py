@@ -0,0 +1,62 @@
+import numpy as np
+
+##################
+# Fixed-capacity history of simulation series
+# The pygame scripts only ever show the last MAX_PLOT_LENGTH periods, so
+# their history does not need to grow without bound.
+##################
+
+class RingBuffer:
+    '''
+    The last `capacity` periods of several series, one row of values per
+    period. All series live in one preallocated float64 block of shape
+    (series, 2 * capacity) and every row is written twice, at column i and
+    i + capacity, so the periods kept are always one contiguous slice per
+    series: window() hands out views, never copies.
+    names: Names of the series, in the order append takes their values
+    capacity: Number of periods kept
+    '''
+    __slots__ = ("names", "capacity", "periods", "_columns", "_data")
+
+    def __init__(self, names, capacity):
+        self.names = tuple(names)
+        self.capacity = capacity
+        self.periods = 0  # Rows appended so far
+        self._columns = {name: k for k, name in enumerate(self.names)}
+        self._data = np.zeros((len(self.names), 2 * capacity))
+
+    def __len__(self):
+        return min(self.periods, self.capacity)
+
+    @property
+    def start(self):
+        '''
+        Period (count of rows appended before it) of the oldest row kept
+        '''
+        return self.periods - len(self)
+
+    def append(self, *values):
+        '''
+        Add the values of one period, ordered as self.names
+        '''
+        i = self.periods % self.capacity
+        self._data[:, i] = values
+        self._data[:, i + self.capacity] = values
+        self.periods += 1
+
+    def window(self, name, length=None):
+        '''
+        View of the last `length` values of a series (default: all kept),
+        oldest first. The view is only valid until the next append.
+        name: Name of the series
+        length: Number of periods
+        '''
+        n = len(self) if length is None else min(length, len(self))
+        end = (self.periods - 1) % self.capacity + self.capacity + 1
+        return self._data[self._columns[name], end - n:end]
+
+    def last(self, name):
+        '''
+        Latest value of a series
+        '''
+        return self._data[self._columns[name], (self.periods - 1) % self.capacity]
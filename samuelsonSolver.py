@@ -0,0 +1,198 @@
+import numpy as np
+
+from shockSchedule import ShockSchedule
+
+##################
+# Samuelson (1939) multiplier-accelerator solvers
+# https://macrosimulation.org/how_to_use
+##################
+
+def iterate_economy(C, I, c1, G0, beta, i, t):
+    '''
+    One period of scenario i: fills C[i, t] and I[i, t] from period t - 1
+    C: Consumption (S x Q)
+    I: Investment (S x Q)
+    c1: Marginal propensity to consume
+    G0: Government expenditures (S x Q, or a ShockSchedule)
+    beta: Accelerator coefficient
+    i: Scenario index
+    t: Period to fill
+    '''
+    C[i, t] = c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1])
+    I[i, t] = beta * (c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1]) -
+                      C[i, t - 1])
+
+    return C, I
+
+
+def solve_samuelson_loop(C, I, G0, c1, beta):
+    '''
+    Reference solver: walks every scenario and period one scalar at a time,
+    exactly as in basicModels.py.
+    C: Consumption (S x Q), column 0 holds the initial values
+    I: Investment (S x Q), column 0 holds the initial values
+    G0: Government expenditures (S x Q, or a ShockSchedule)
+    c1: Marginal propensity to consume
+    beta: Accelerator coefficient
+    '''
+    S, Q = C.shape
+    for i in range(S):
+        for t in range(1, Q):
+            C[i, t] = c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1])
+            I[i, t] = beta * (c1 * (C[i, t - 1] + I[i, t - 1] + G0[i, t - 1]) -
+                              C[i, t - 1])
+
+    return C, I
+
+
+def solve_samuelson(C, I, G0, c1, beta):
+    '''
+    Vectorized solver: advances all S scenarios together, one whole column
+    per period. Fills C and I in place and returns identical results to
+    solve_samuelson_loop.
+    C: Consumption (S x Q), column 0 holds the initial values
+    I: Investment (S x Q), column 0 holds the initial values
+    G0: Government expenditures (S x Q, or a ShockSchedule)
+    c1: Marginal propensity to consume
+    beta: Accelerator coefficient
+    '''
+    Q = C.shape[1]
+
+    # Column views are strided for C-ordered (S x Q) matrices, so step on
+    # contiguous (Q x S) copies and write the result back once at the end
+    C_t = np.ascontiguousarray(C.T)
+    I_t = np.ascontiguousarray(I.T)
+    if isinstance(G0, ShockSchedule):
+        # One row per segment, shared by all the periods of the segment
+        breakpoints = G0.breakpoints()
+        segment = np.searchsorted([start for start, _ in breakpoints], np.arange(Q), side="right") - 1
+        G0_t = [breakpoints[j][1] for j in segment]
+    else:
+        G0_t = np.ascontiguousarray(G0.T)
+
+    # Scratch row for the induced consumption c1 * Y[t - 1]
+    induced = np.empty(C_t.shape[1])
+
+    for t in range(1, Q):
+        np.add(C_t[t - 1], I_t[t - 1], out=induced)
+        np.add(induced, G0_t[t - 1], out=induced)
+        np.multiply(c1, induced, out=induced)
+
+        C_t[t] = induced
+        np.subtract(induced, C_t[t - 1], out=I_t[t])
+        np.multiply(beta, I_t[t], out=I_t[t])
+
+    C[:, 1:] = C_t[1:].T
+    I[:, 1:] = I_t[1:].T
+
+    return C, I
+
+
+##################
+# State-space form
+# The recursion is linear in the state x_t = [C_t, I_t, G0_t]:
+#   C_t = c1 * C_{t-1} + c1 * I_{t-1} + c1 * G0_{t-1}
+#   I_t = beta * (c1 - 1) * C_{t-1} + beta * c1 * I_{t-1} + beta * c1 * G0_{t-1}
+# and G0 stays put while it is constant, so k periods of a constant G0 are
+# a single matrix power of the companion matrix below.
+##################
+
+def companion_matrix(c1, beta):
+    '''
+    Companion matrix of the Samuelson recursion on the state [C, I, G0]
+    c1: Marginal propensity to consume
+    beta: Accelerator coefficient
+    '''
+    return np.array([[c1, c1, c1],
+                     [beta * (c1 - 1), beta * c1, beta * c1],
+                     [0, 0, 1]])
+
+
+def fast_forward(C, I, G0, c1, beta, k):
+    '''
+    Jump k periods ahead while G0 is held constant, without stepping through
+    the periods in between. Uses repeated squaring, so the cost is
+    O(log k) 3x3 products whatever the number of scenarios.
+    C: Consumption now (scalar or length S array)
+    I: Investment now (scalar or length S array)
+    G0: Government expenditures over the k periods (scalar or length S array)
+    c1: Marginal propensity to consume
+    beta: Accelerator coefficient
+    k: Number of periods to jump
+    '''
+    C, I, G0 = np.broadcast_arrays(np.asarray(C, dtype=float),
+                                   np.asarray(I, dtype=float),
+                                   np.asarray(G0, dtype=float))
+    M_k = np.linalg.matrix_power(companion_matrix(c1, beta), k)
+    x = M_k @ np.stack([C.ravel(), I.ravel(), G0.ravel()])
+
+    return x[0].reshape(C.shape), x[1].reshape(C.shape)
+
+
+def samuelson_state_at(t, C0, I0, breakpoints, c1, beta):
+    '''
+    Consumption, investment and output in period t, starting from (C0, I0)
+    in period 0. G0 is given as piecewise-constant segments, so the cost is
+    O(number of segments) matrix powers instead of O(t) steps.
+    t: Period to evaluate
+    C0: Initial consumption (scalar or length S array)
+    I0: Initial investment (scalar or length S array)
+    breakpoints: Sorted (period, G0) pairs, first period 0; G0 holds that
+                 value from its period until the next breakpoint. Or a
+                 ShockSchedule
+    c1: Marginal propensity to consume
+    beta: Accelerator coefficient
+    '''
+    if isinstance(breakpoints, ShockSchedule):
+        breakpoints = breakpoints.breakpoints()
+    if not breakpoints or breakpoints[0][0] != 0:
+        raise ValueError("breakpoints must start at period 0")
+
+    C, I = C0, I0
+    for j, (start, G0) in enumerate(breakpoints):
+        if start >= t:
+            break
+        end = breakpoints[j + 1][0] if j + 1 < len(breakpoints) else t
+        C, I = fast_forward(C, I, G0, c1, beta, min(end, t) - start)
+
+    # G0 in period t itself comes from the last segment started by then
+    G0_t = [G0 for start, G0 in breakpoints if start <= t][-1]
+
+    C, I = np.asarray(C, dtype=float), np.asarray(I, dtype=float)
+    Y = C + I + G0_t
+
+    return C, I, Y
+
+
+def long_run_levels(G0, c1):
+    '''
+    Stationary C, I and Y for a permanent level of G0 (the fixed point of
+    the recursion; reached only when the dynamics are stable).
+    G0: Government expenditures (scalar or length S array)
+    c1: Marginal propensity to consume
+    '''
+    Y = np.asarray(G0, dtype=float) / (1 - c1)
+    C = c1 * Y
+    I = np.zeros_like(Y)
+
+    return C, I, Y
+
+
+def shock_response(s, k, C0, I0, G0_before, G0_after, c1, beta):
+    '''
+    Change in output in period s + k caused by a permanent step in G0 from
+    G0_before to G0_after in period s, relative to no step.
+    s: Period of the shock
+    k: Periods after the shock
+    C0: Initial consumption (scalar or length S array)
+    I0: Initial investment (scalar or length S array)
+    G0_before: Government expenditures before the shock
+    G0_after: Government expenditures from period s onwards
+    c1: Marginal propensity to consume
+    beta: Accelerator coefficient
+    '''
+    _, _, Y_base = samuelson_state_at(s + k, C0, I0, [(0, G0_before)], c1, beta)
+    _, _, Y_shock = samuelson_state_at(s + k, C0, I0, [(0, G0_before), (s, G0_after)],
+                                       c1, beta)
+
+    return Y_shock - Y_base
@@ -0,0 +1,274 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from shockSchedule import ShockSchedule
+
+##################
+# Streaming Samuelson (1939) runs
+# solve_samuelson needs the full (S x Q) C, I and G0 matrices, but the
+# recursion only looks one period back:
+#   C_t = c1 * Y_{t-1}
+#   I_t = beta * (C_t - C_{t-1})
+#   Y_t = C_t + I_t + G0_t
+# stream_samuelson carries just C and Y of the last period between chunks
+# and yields the run `chunk` periods at a time, so memory is O(S * chunk)
+# whatever the number of periods. Each chunk can be handed to sinks that
+# write it to disk, keep running statistics or thin it out for plotting.
+#
+# python samuelsonStream.py --scenarios 100000 --periods 100000 --output run
+##################
+
+class SamuelsonChunk:
+    '''
+    Periods start to stop - 1 of all scenarios. C, I and Y have shape
+    (S x periods) like the matrices of basicModels.py, and are overwritten by
+    the next chunk: copy them to keep them.
+    '''
+    __slots__ = ("start", "stop", "C", "I", "Y")
+
+    def __init__(self, start, stop, C, I, Y):
+        self.start = start
+        self.stop = stop
+        self.C = C
+        self.I = I
+        self.Y = Y
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+def _segments(G0):
+    # G0 as sorted (period, G0) breakpoints starting at period 0, as in
+    # samuelsonSolver.samuelson_state_at; a plain value holds for all periods
+    if isinstance(G0, ShockSchedule):
+        return G0.breakpoints()
+    if isinstance(G0, (list, tuple)):
+        if not G0 or G0[0][0] != 0:
+            raise ValueError("breakpoints must start at period 0")
+        return [(start, np.asarray(value, dtype=float)) for start, value in G0]
+    return [(0, np.asarray(G0, dtype=float))]
+
+
+def stream_samuelson(C0, I0, G0, c1, beta, periods, chunk=64, sinks=()):
+    '''
+    Generator of SamuelsonChunk for periods 0 to periods - 1, identical to
+    solve_samuelson on the full matrices. Sinks get every chunk first and
+    are closed when the run ends.
+    C0: Initial consumption (scalar or length S array)
+    I0: Initial investment (scalar or length S array)
+    G0: Government expenditures (scalar or length S array), sorted
+        (period, G0) breakpoints starting at period 0, or a ShockSchedule
+    c1: Marginal propensity to consume
+    beta: Accelerator coefficient
+    periods: Number of periods Q
+    chunk: Periods per chunk
+    sinks: Objects with a write(chunk) method and optionally close()
+    '''
+    segments = _segments(G0)
+    S = np.broadcast(np.asarray(C0), np.asarray(I0), *(value for _, value in segments)).size
+
+    # Period-major buffers, so every period is a contiguous row; the chunks
+    # hand out transposed (S x periods) views of them
+    C_buf, I_buf, Y_buf = (np.empty((min(chunk, periods), S)) for _ in range(3))
+    C_last = np.empty(S)  # Last period of the previous chunk: all the state there is
+    Y_last = np.empty(S)
+    G_now = np.empty(S)
+    segment = 0
+
+    try:
+        for start in range(0, periods, chunk):
+            stop = min(start + chunk, periods)
+            C_t, I_t, Y_t = C_buf[:stop - start], I_buf[:stop - start], Y_buf[:stop - start]
+            for k, t in enumerate(range(start, stop)):
+                if t == 0:
+                    C_t[0] = C0
+                    I_t[0] = I0
+                else:
+                    C_prev = C_t[k - 1] if k else C_last
+                    np.multiply(c1, Y_t[k - 1] if k else Y_last, out=C_t[k])
+                    np.subtract(C_t[k], C_prev, out=I_t[k])
+                    np.multiply(beta, I_t[k], out=I_t[k])
+
+                while segment < len(segments) and segments[segment][0] <= t:
+                    G_now[:] = segments[segment][1]
+                    segment += 1
+                np.add(C_t[k], I_t[k], out=Y_t[k])
+                np.add(Y_t[k], G_now, out=Y_t[k])
+
+            C_last[:] = C_t[-1]
+            Y_last[:] = Y_t[-1]
+
+            block = SamuelsonChunk(start, stop, C_t.T, I_t.T, Y_t.T)
+            for sink in sinks:
+                sink.write(block)
+            yield block
+    finally:
+        for sink in sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+
+
+def run_stream(stream):
+    '''
+    Run a stream to the end for its sinks; returns the number of periods
+    '''
+    periods = 0
+    for block in stream:
+        periods = block.stop
+    return periods
+
+
+##################
+# Sinks
+##################
+
+class SeriesWriter:
+    '''
+    Writes C, I and Y to one .npy file per variable, period-major (shape
+    Q x S), so each chunk is a single contiguous write. Read back with
+    np.load(path, mmap_mode="r").
+    path: Directory, created if needed
+    S: Number of scenarios
+    periods: Number of periods Q
+    variables: Variables to write
+    dtype: Type on disk, e.g. np.float32 to halve the file size
+    '''
+    def __init__(self, path, S, periods, variables=("C", "I", "Y"), dtype=np.float64):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.files = {name: np.lib.format.open_memmap(os.path.join(path, name + ".npy"), mode="w+",
+                                                      dtype=dtype, shape=(periods, S))
+                      for name in variables}
+
+    def write(self, block):
+        for name, series in self.files.items():
+            # The chunk's arrays are transposed views of period-major rows
+            series[block.start:block.stop] = block[name].T
+
+    def close(self):
+        for series in self.files.values():
+            series.flush()
+        self.files = {}
+
+
+class OnlineStats:
+    '''
+    Running mean, variance, minimum and maximum over periods of every
+    scenario, merged chunk by chunk (Chan et al.), without keeping the
+    series
+    variables: Variables to follow
+    '''
+    def __init__(self, variables=("Y",)):
+        self.variables = tuple(variables)
+        self.count = 0
+        self.stats = {}
+
+    def write(self, block):
+        n = len(block)
+        for name in self.variables:
+            values = block[name]
+            mean = values.mean(axis=1)
+            m2 = ((values - mean[:, None]) ** 2).sum(axis=1)
+            if name not in self.stats:
+                self.stats[name] = {"mean": mean, "m2": m2,
+                                    "min": values.min(axis=1), "max": values.max(axis=1)}
+                continue
+            stats = self.stats[name]
+            delta = mean - stats["mean"]
+            total = self.count + n
+            stats["mean"] += delta * n / total
+            stats["m2"] += m2 + delta ** 2 * self.count * n / total
+            np.minimum(stats["min"], values.min(axis=1), out=stats["min"])
+            np.maximum(stats["max"], values.max(axis=1), out=stats["max"])
+        self.count += n
+
+    def mean(self, name="Y"):
+        return self.stats[name]["mean"]
+
+    def var(self, name="Y"):
+        return self.stats[name]["m2"] / self.count
+
+    def std(self, name="Y"):
+        return np.sqrt(self.var(name))
+
+    def min(self, name="Y"):
+        return self.stats[name]["min"]
+
+    def max(self, name="Y"):
+        return self.stats[name]["max"]
+
+
+class Decimator:
+    '''
+    Keeps every `every`-th period of a few scenarios, enough to plot a run
+    far longer than the chart is wide
+    every: Keep periods 0, every, 2 * every, ...
+    scenarios: Indices of the scenarios to keep (default: all)
+    variables: Variables to keep
+    '''
+    def __init__(self, every, scenarios=None, variables=("Y",)):
+        self.every = every
+        self.scenarios = scenarios
+        self.variables = tuple(variables)
+        self.parts = {name: [] for name in self.variables}
+        self.period_parts = []
+
+    def write(self, block):
+        first = -block.start % self.every  # First kept period in the chunk
+        periods = np.arange(block.start + first, block.stop, self.every)
+        self.period_parts.append(periods)
+        for name in self.variables:
+            values = block[name][:, first::self.every]
+            if self.scenarios is not None:
+                values = values[self.scenarios]
+            self.parts[name].append(np.array(values))
+
+    @property
+    def periods(self):
+        return np.concatenate(self.period_parts) if self.period_parts else np.empty(0, dtype=int)
+
+    def series(self, name="Y"):
+        '''
+        Kept values of a variable, shape (scenarios x kept periods)
+        '''
+        return np.concatenate(self.parts[name], axis=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a long Samuelson run of many scenarios")
+    parser.add_argument("--scenarios", type=int, default=100000)
+    parser.add_argument("--periods", type=int, default=100000)
+    parser.add_argument("--chunk", type=int, default=64, help="periods per chunk")
+    parser.add_argument("--c1", type=float, default=0.8)
+    parser.add_argument("--beta", type=float, default=0.6)
+    parser.add_argument("--shock", type=int, default=15, help="period of the step in G0")
+    parser.add_argument("--output", help="directory for C.npy, I.npy and Y.npy (period-major)")
+    parser.add_argument("--float32", action="store_true", help="write float32 files")
+    args = parser.parse_args()
+
+    # G0 = 5 in every scenario, stepping to 5..6 across scenarios at the shock
+    S, Q = args.scenarios, args.periods
+    G0 = ShockSchedule(S, 5)
+    G0.set(None, args.shock, np.linspace(5, 6, S))
+    stats = OnlineStats(("C", "I", "Y"))
+    plot = Decimator(max(1, Q // 1000), scenarios=[0, S - 1])
+    sinks = [stats, plot]
+    if args.output:
+        sinks.append(SeriesWriter(args.output, S, Q, dtype=np.float32 if args.float32 else np.float64))
+
+    begin = time.perf_counter()
+    run_stream(stream_samuelson(1.0, 1.0, G0, args.c1, args.beta, Q, args.chunk, sinks))
+    elapsed = time.perf_counter() - begin
+
+    print(str(S) + " scenarios x " + str(Q) + " periods in " + str(round(elapsed, 2)) + " s (" +
+          str(round(S * Q / elapsed / 1e6, 1)) + "M periods/s)")
+    print("Y, last kept period:    " + str(plot.series("Y")[:, -1]))
+    print("Y long-run (G0/(1-c1)): " + str(np.array([5, 6]) / (1 - args.c1)))
+    print("Y mean over the run:    " + str(stats.mean("Y")[[0, -1]]))
+    print("Y std over the run:     " + str(stats.std("Y")[[0, -1]]))
@@ -0,0 +1,117 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+##################
+# Sweep results in shared memory
+# The result arrays of a sweep (Y_star, w_star, ... one row per variable,
+# plus the converged flags) live in one multiprocessing.shared_memory
+# segment. Worker processes attach to it by name and write their chunk in
+# place, and the parent reads the same memory as NumPy arrays: nothing is
+# pickled back and nothing is copied.
+#
+# Lifetime: the parent creates the segment and unlinks its name as soon as
+# the sweep ends, also when a worker crashed; the memory itself is freed
+# once the last array over it is gone. If the parent dies, the
+# multiprocessing resource tracker unlinks the segment.
+##################
+
+class _Mapped(np.ndarray):
+    # Byte array over a segment that holds the segment open: arrays derived
+    # from it keep it as their base, so the segment is only closed once the
+    # last of them is gone
+    pass
+
+
+def _attach(name):
+    try:
+        # Python 3.13+: do not hand the segment to the resource tracker, the
+        # parent owns it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedResults:
+    '''
+    Result arrays of a sweep in a shared memory segment: a float64 row per
+    variable, NaN until written, and a converged flag per scenario
+    variables: Names of the variables, e.g. ("Y", "w", "N", "C", "r", "I", "rn", "P")
+    n: Number of scenarios
+    '''
+    def __init__(self, variables, n, _shm=None):
+        self.variables = tuple(variables)
+        self.n = n
+        size = len(self.variables) * n * 8 + n
+        self.owner = _shm is None
+        shm = self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1)) if self.owner else _shm
+        self.name = shm.name
+
+        raw = np.ndarray((shm.size,), dtype=np.uint8, buffer=shm.buf).view(_Mapped)
+        raw.shm = shm
+        self.matrix = np.asarray(raw[:len(self.variables) * n * 8]).view(np.float64).reshape(len(self.variables), n)
+        self.converged = np.asarray(raw[len(self.variables) * n * 8:size]).view(bool)
+        self.values = dict(zip(self.variables, self.matrix))
+        if self.owner:
+            self.matrix[:] = np.nan
+            self.converged[:] = False
+
+    @property
+    def handle(self):
+        '''
+        What a worker needs to attach: (name, variables, n)
+        '''
+        return self.name, self.variables, self.n
+
+    @classmethod
+    def attach(cls, handle):
+        '''
+        Open the segment of an existing SharedResults in another process
+        handle: SharedResults.handle of the owner
+        '''
+        name, variables, n = handle
+        return cls(variables, n, _shm=_attach(name))
+
+    def write(self, start, values, converged):
+        '''
+        Store the results of scenarios start, start + 1, ...
+        values: Array of shape (variables, chunk)
+        converged: Flags of the chunk
+        '''
+        stop = start + len(converged)
+        self.matrix[:, start:stop] = values
+        self.converged[start:stop] = converged
+
+    def unlink(self):
+        '''
+        Remove the segment's name (owner only; safe to call more than once).
+        Arrays already handed out stay valid.
+        '''
+        if not self.owner:
+            return
+        self.owner = False
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+        return False
+
+
+# Segments this worker process has attached to, by name; a worker solves
+# many chunks of the same sweep
+_attached = {}
+
+def attached(handle):
+    '''
+    The SharedResults of handle in this process, attached on first use
+    '''
+    results = _attached.get(handle[0])
+    if results is None:
+        results = _attached[handle[0]] = SharedResults.attach(handle)
+    return results
@@ -0,0 +1,134 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+##################
+# Piecewise-constant exogenous variables
+# The scripts store an exogenous variable as an (S x Q) matrix even though
+# it only changes at a few shock periods:
+#
+#   G0 = np.ones((S, Q))*5
+#   G0[1, s:Q] = 6
+#
+# A ShockSchedule keeps a sorted list of (period, value) breakpoints per
+# scenario instead, O(S * shocks) whatever Q:
+#
+#   G0 = ShockSchedule(S, 5)
+#   G0.set(1, s, 6)
+#
+# Indexing reads it like the matrix (G0[i, t], G0[:, t]), and the Samuelson
+# solvers step it segment by segment without ever expanding it.
+##################
+
+class ShockSchedule:
+    '''
+    An exogenous variable of S scenarios that is constant between shocks;
+    a value holds from its period until the next breakpoint of its scenario
+    S: Number of scenarios
+    initial: Value in period 0 (scalar or length S array)
+    '''
+    def __init__(self, S, initial):
+        self.S = S
+        self.periods = [[0] for _ in range(S)]  # Per scenario, sorted and starting at 0
+        self.values = [[float(value)] for value in np.broadcast_to(np.asarray(initial, dtype=float), S)]
+
+    def __len__(self):
+        return self.S
+
+    def _scenarios(self, scenarios):
+        # Scenario indices of an index, slice, list or boolean mask
+        if scenarios is None:
+            return range(self.S)
+        return np.atleast_1d(np.arange(self.S)[scenarios])
+
+    def set(self, scenarios, start, value, stop=None):
+        '''
+        Shock: the same as G0[scenarios, start:stop] = value on the matrix
+        scenarios: Index, slice, list or mask of scenarios (None: all)
+        start: First period of the new value
+        value: New value (scalar or one per scenario)
+        stop: Period in which the old value returns (default: never)
+        '''
+        scenarios = self._scenarios(scenarios)
+        for i, new in zip(scenarios, np.broadcast_to(np.asarray(value, dtype=float), len(scenarios))):
+            periods, values = self.periods[i], self.values[i]
+            if stop is not None:
+                if stop <= start:
+                    continue
+                resume = values[bisect_right(periods, stop) - 1]
+            begin = bisect_left(periods, start)
+            end = len(periods) if stop is None else bisect_right(periods, stop)
+            periods[begin:end] = [start] if stop is None else [start, stop]
+            values[begin:end] = [float(new)] if stop is None else [float(new), resume]
+            self._compact(i)
+
+    def _compact(self, i):
+        # Drop breakpoints that do not change the value
+        periods, values = self.periods[i], self.values[i]
+        keep = [k for k in range(len(periods)) if k == 0 or values[k] != values[k - 1]]
+        if len(keep) < len(periods):
+            self.periods[i] = [periods[k] for k in keep]
+            self.values[i] = [values[k] for k in keep]
+
+    def value(self, i, t):
+        '''
+        Value of scenario i in period t
+        '''
+        return self.values[i][bisect_right(self.periods[i], t) - 1]
+
+    def at(self, t, scenarios=None):
+        '''
+        Values of all (or the given) scenarios in period t
+        '''
+        return np.array([self.value(i, t) for i in self._scenarios(scenarios)])
+
+    def __getitem__(self, key):
+        # G0[i, t] and G0[:, t], read like the (S x Q) matrix
+        scenarios, t = key
+        if isinstance(t, slice):
+            raise TypeError("a shock schedule has no period slices; use at(), breakpoints() or dense()")
+        if isinstance(scenarios, (int, np.integer)):
+            return self.value(scenarios, t)
+        return self.at(t, scenarios)
+
+    def breakpoints(self):
+        '''
+        Sorted (period, values of all scenarios) pairs, one per period in
+        which any scenario changes: the breakpoints of samuelson_state_at
+        and stream_samuelson
+        '''
+        starts = sorted(set(period for periods in self.periods for period in periods))
+        rows = np.empty((len(starts), self.S))
+        for i in range(self.S):
+            periods = self.periods[i]
+            for k, value in enumerate(self.values[i]):
+                rows[bisect_left(starts, periods[k]):
+                     bisect_left(starts, periods[k + 1]) if k + 1 < len(periods) else len(starts), i] = value
+        return list(zip(starts, rows))
+
+    def add_to(self, out):
+        '''
+        Add the schedule to an (S x Q) array in place (e.g. Y = C + I + G0 as
+        G0.add_to(C + I)), one slice per segment; returns out
+        '''
+        for i in range(self.S):
+            periods = self.periods[i]
+            for k, value in enumerate(self.values[i]):
+                out[i, periods[k]:periods[k + 1] if k + 1 < len(periods) else None] += value
+        return out
+
+    def dense(self, Q):
+        '''
+        The (S x Q) matrix, for code that needs one
+        '''
+        return self.add_to(np.zeros((self.S, Q)))
+
+    @property
+    def shocks(self):
+        '''
+        Number of breakpoints after period 0, over all scenarios
+        '''
+        return sum(len(periods) - 1 for periods in self.periods)
+
+    def __repr__(self):
+        return ("ShockSchedule(scenarios=" + str(self.S) + ", shocks=" + str(self.shocks) + ")")
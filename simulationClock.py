@@ -0,0 +1,83 @@
+import time
+
+##################
+# Simulation clock, decoupled from the render clock
+# The pygame loop runs at the display rate (clock.tick(FPS)); each frame
+# the simulation clock says how many model steps are due, from a fixed
+# timestep accumulator, so the model can step slower or much faster than
+# the screen is redrawn.
+##################
+
+class SimulationClock:
+    '''
+    Decides how many simulation steps to run in each frame
+    steps_per_second: Target simulation rate, or None for as fast as
+                      possible (as many steps as fit in frame_budget of
+                      every frame)
+    frame_budget: Seconds per frame spent stepping when running as fast as
+                  possible; keep it below the frame time so there is time
+                  left to draw
+    max_frame_time: Longest frame (seconds) the accumulator catches up on;
+                    after a stall the backlog is dropped rather than run
+                    all at once
+    '''
+    def __init__(self, steps_per_second, frame_budget=0.025, max_frame_time=0.25):
+        self.steps_per_second = steps_per_second
+        self.frame_budget = frame_budget
+        self.max_frame_time = max_frame_time
+        self.turbo = False
+        self.accumulator = 0.0
+        self.due = 0
+        self.deadline = None
+        self.steps = 0  # Steps run in the current frame
+
+    @property
+    def fast(self):
+        return self.turbo or self.steps_per_second is None
+
+    def toggle_turbo(self):
+        '''
+        Switch between the target rate and as fast as possible
+        '''
+        self.turbo = not self.turbo
+        self.accumulator = 0.0
+
+    def scale(self, factor):
+        '''
+        Multiply the target rate by factor (e.g. 2 or 0.5)
+        '''
+        if self.steps_per_second is not None:
+            self.steps_per_second *= factor
+
+    def request(self, steps=1):
+        '''
+        Run extra steps in this frame, on top of the clock (e.g. a key press)
+        '''
+        self.due += steps
+
+    def start_frame(self, dt):
+        '''
+        Begin a frame, dt seconds after the previous one
+        '''
+        self.steps = 0
+        if self.fast:
+            self.deadline = time.perf_counter() + self.frame_budget
+            return
+
+        self.deadline = None
+        self.accumulator += min(dt, self.max_frame_time) * self.steps_per_second
+        due = int(self.accumulator)
+        self.accumulator -= due
+        self.due += due
+
+    def step(self):
+        '''
+        True while another simulation step is due in this frame; use as
+        `while sim_clock.step(): ...`
+        '''
+        if self.due > 0:
+            self.due -= 1
+        elif self.deadline is None or time.perf_counter() >= self.deadline:
+            return False
+        self.steps += 1
+        return True
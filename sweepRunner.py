@@ -0,0 +1,267 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import neoclassicalSolver
+import neoclassicalSynthesisSolver
+from resultsStore import META_FILE, ResultsStore
+from sharedResults import SharedResults, attached
+
+##################
+# Parameter sweeps of the neoclassical models across all cores
+# A sweep is a set of scenarios, given as a grid or as random draws of the
+# scenario parameters. It is split into chunks, every chunk is solved with
+# the model's batched solver in a worker process, and the equilibria are
+# written straight into preallocated result arrays in shared memory (see
+# sharedResults.py).
+#
+# python sweepRunner.py neoclassical --draws 1000000 --range M0=4:6 --range G0=0.5:2
+# python sweepRunner.py synthesis --grid i0=1:3:100 --grid A=1.5,2,2.5
+##################
+
+# Parameters and variables of each model, with the constants of
+# neoClassicalMacro.py and neoclassicalSynthesis.py as defaults
+MODELS = {
+    "neoclassical": {
+        "variables": neoclassicalSolver.VARIABLES,
+        "defaults": dict(A=2, a=0.3, K=5, leisure=0.4, discount_rate=0.9, money_pref=0.6,
+                         G0=1, Yf=1, Gf=1, M0=5, pe=0.02),
+    },
+    "synthesis": {
+        "variables": neoclassicalSynthesisSolver.VARIABLES,
+        "defaults": dict(G0=1, c0=2, c1=0.6, T0=1, i0=2, i1=0.1, m0=6, M0=5, m2=0.4, m1=0.2,
+                         Nf=5, A=2, a=0.3, K=4, P0=1, b=0.4),
+    },
+}
+
+def parameter_grid(**values):
+    '''
+    Every combination of the given parameter values, as one flat array per
+    parameter (the last parameter varies fastest)
+    values: Parameter name: list of values
+    '''
+    names = list(values)
+    combinations = np.array(list(itertools.product(*(values[name] for name in names))), dtype=float)
+    return {name: combinations[:, k] for k, name in enumerate(names)}
+
+
+def random_draws(n, seed=None, **ranges):
+    '''
+    n independent uniform draws of the given parameters
+    n: Number of draws
+    seed: Seed of the random generator
+    ranges: Parameter name: (low, high)
+    '''
+    rng = np.random.default_rng(seed)
+    return {name: rng.uniform(low, high, n) for name, (low, high) in ranges.items()}
+
+
+def solve_chunk(model, params, tol=1e-10, max_iter=None):
+    '''
+    Solve one chunk of scenarios with the model's batched solver. Returns the
+    values of the model's variables (shape (variables, n)), the converged
+    flags and the number of solver iterations.
+    model: "neoclassical" or "synthesis"
+    params: All parameters of the model, as scalars or length n arrays
+    '''
+    if model == "neoclassical":
+        # The batched Newton solver sizes the batch from the scenario
+        # parameters, so give those the length of the chunk
+        n = np.broadcast(*(np.asarray(p) for p in params.values())).size
+        params = dict(params)
+        for name in ("A", "leisure", "G0", "Yf", "M0"):
+            params[name] = np.broadcast_to(params[name], n)
+        result = neoclassicalSolver.solve_equilibrium_newton(tol=tol, max_iter=max_iter or 50, **params)
+        return np.array(result.state()), result.converged, result.iterations
+
+    result = neoclassicalSynthesisSolver.solve_synthesis_batch(tol=tol, max_iter=max_iter or 1000, **params)
+    return result.x, result.converged, result.iterations
+
+
+def _solve_chunk(model, start, params, tol, max_iter, handle):
+    # Worker entry point: solve the chunk and write it into the shared
+    # results at its offset; only the iteration count goes back
+    values, converged, iterations = solve_chunk(model, params, tol, max_iter)
+    attached(handle).write(start, values, converged)
+    return iterations
+
+
+class SweepResult:
+    '''
+    Equilibria of a sweep, one entry per scenario
+    model: Model name
+    params: Parameters that varied, name: length n array
+    values: Variable name: length n array of equilibrium values
+    converged: Length n array of flags
+    elapsed: Wall time of the sweep in seconds
+    constants: Values of the other parameters
+    '''
+    def __init__(self, model, params, values, converged, elapsed, constants=None):
+        self.model = model
+        self.params = params
+        self.constants = constants or {}
+        self.values = values
+        self.converged = converged
+        self.elapsed = elapsed
+
+    def __len__(self):
+        return len(self.converged)
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    @property
+    def throughput(self):
+        '''
+        Equilibria per second
+        '''
+        return len(self) / self.elapsed
+
+    def save(self, path, name=None):
+        '''
+        Append the sweep as a block to the results store at path (see
+        resultsStore.py), created on first use with a column per varied
+        parameter and variable, plus converged. The store's parameters only
+        name the model; the block records which parameters varied and the
+        values of all the others, which may differ from sweep to sweep, but
+        every sweep in a store must vary the same parameters.
+        path: Directory of the store
+        name: Name of the block
+        '''
+        columns = dict(self.params, **self.values, converged=self.converged)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            store = ResultsStore(path)
+            if store.parameters.get("model") != self.model:
+                raise ValueError("the store in " + path + " holds " + str(store.parameters.get("model")) +
+                                 " results, not " + self.model)
+            # A column per varied parameter: sweeps varying other parameters
+            # need a store of their own
+            varied = [column for column in store.columns if column not in self.values and column != "converged"]
+            if set(varied) != set(self.params):
+                raise ValueError("the store in " + path + " holds sweeps varying " + ", ".join(sorted(varied)) +
+                                 ", not " + ", ".join(sorted(self.params)) + "; save to a new store")
+        else:
+            store = ResultsStore.create(path, list(columns), {"model": self.model}, dtypes={"converged": bool})
+        store.append(columns, name=name, model=self.model, varied=list(self.params),
+                     constants={k: float(v) for k, v in self.constants.items()})
+        return store
+
+    def __repr__(self):
+        return ("SweepResult(model=" + self.model + ", scenarios=" + str(len(self)) + ", converged=" +
+                str(int(self.converged.sum())) + ", equilibria/s=" + str(round(self.throughput)) + ")")
+
+
+def run_sweep(model, params, constants=None, chunk_size=10000, workers=None, tol=1e-10, max_iter=None,
+              verbose=True):
+    '''
+    Solve every scenario of a sweep across a pool of worker processes
+    model: "neoclassical" or "synthesis"
+    params: Parameters that vary, name: length n array (see parameter_grid
+            and random_draws)
+    constants: Values of other parameters, replacing the model defaults
+    chunk_size: Scenarios per task
+    workers: Number of worker processes (default: all cores); 0 solves in
+             this process
+    tol: Tolerance of the solver
+    max_iter: Iteration cap of the solver (default: the solver's own)
+    '''
+    spec = MODELS[model]
+    if not params:
+        raise ValueError("no parameters to sweep")
+    unknown = set(params) | set(constants or {})
+    unknown -= set(spec["defaults"])
+    if unknown:
+        raise ValueError("unknown parameters for " + model + ": " + ", ".join(sorted(unknown)))
+
+    params = {name: np.asarray(values, dtype=float) for name, values in params.items()}
+    n = next(iter(params.values())).size
+    mismatched = [name + " (shape " + str(values.shape) + ")" for name, values in params.items()
+                  if values.shape != (n,)]
+    if mismatched:
+        raise ValueError("every swept parameter needs a 1-d array of " + str(n) + " values, as many as " +
+                         next(iter(params)) + "; got " + ", ".join(mismatched))
+    base = dict(spec["defaults"], **(constants or {}))
+
+    # Preallocated results, filled in place as chunks complete
+    variables = spec["variables"]
+
+    def chunk(start):
+        stop = min(start + chunk_size, n)
+        return dict(base, **{name: values[start:stop] for name, values in params.items()})
+
+    starts = range(0, n, chunk_size)
+    begin = time.perf_counter()
+    if workers == 0:
+        results = np.empty((len(variables), n))
+        converged = np.zeros(n, dtype=bool)
+        for start in starts:
+            values, flags, iterations = solve_chunk(model, chunk(start), tol, max_iter)
+            results[:, start:start + len(flags)] = values
+            converged[start:start + len(flags)] = flags
+        values = dict(zip(variables, results))
+    else:
+        # The segment's name is removed when the sweep ends, also when a
+        # worker crashed (BrokenProcessPool); the arrays stay valid
+        with SharedResults(variables, n) as shared:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                futures = [pool.submit(_solve_chunk, model, start, chunk(start), tol, max_iter, shared.handle)
+                           for start in starts]
+                for future in as_completed(futures):
+                    future.result()
+        values, converged = shared.values, shared.converged
+    elapsed = time.perf_counter() - begin
+
+    constants = {k: v for k, v in base.items() if k not in params}
+    result = SweepResult(model, params, values, converged, elapsed, constants)
+    if verbose:
+        print(model + ": " + str(n) + " scenarios in " + str(round(elapsed, 2)) + " s, " +
+              str(round(result.throughput)) + " equilibria/s, " + str(int(converged.sum())) + " converged")
+    return result
+
+
+def _parse_values(text):
+    # "1:3:5" -> 5 values from 1 to 3, "1,2,2.5" -> those values
+    if ":" in text:
+        low, high, count = text.split(":")
+        return np.linspace(float(low), float(high), int(count))
+    return [float(value) for value in text.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the parameters of a neoclassical model")
+    parser.add_argument("model", choices=sorted(MODELS))
+    parser.add_argument("--grid", action="append", default=[],
+                        help="name=low:high:count or name=v1,v2,... (repeatable)")
+    parser.add_argument("--draws", type=int, help="number of random draws")
+    parser.add_argument("--range", action="append", default=[], help="name=low:high of a drawn parameter (repeatable)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--set", action="append", default=[], help="name=value of a constant (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores, 0: none)")
+    parser.add_argument("--store", help="results store directory to append the sweep to")
+    args = parser.parse_args()
+
+    if args.draws:
+        ranges = {}
+        for item in args.range:
+            name, bounds = item.split("=")
+            ranges[name] = tuple(float(x) for x in bounds.split(":"))
+        params = random_draws(args.draws, args.seed, **ranges)
+    else:
+        params = parameter_grid(**{item.split("=")[0]: _parse_values(item.split("=")[1]) for item in args.grid})
+    constants = {item.split("=")[0]: float(item.split("=")[1]) for item in args.set}
+
+    result = run_sweep(args.model, params, constants, chunk_size=args.chunk_size, workers=args.workers)
+    if args.store:
+        store = result.save(args.store)
+        print("Stored as " + store.blocks[-1]["name"] + " in " + args.store + " (" + str(len(store)) + " rows)")
+    for name, values in result.values.items():
+        finite = values[result.converged]
+        if len(finite):
+            print(name.ljust(4) + " mean " + str(round(float(finite.mean()), 4)).ljust(10) +
+                  " min " + str(round(float(finite.min()), 4)).ljust(10) +
+                  " max " + str(round(float(finite.max()), 4)))